@@ -1,9 +1,21 @@
 import gradio as gr
+import copy
+import re
 import json
+import hashlib
+import pickle
+import orjson
+import numpy as np
+import pandas as pd
 import os
-import subprocess
+import logging
 import atexit
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
+from utils.validators import decode_portfolio_json
 from portfolio.aggregator import process_portfolio_data
 from portfolio.optimizer import optimize_family_portfolio, generate_efficient_frontier
 from portfolio.risk_analyzer import analyze_portfolio_risk, simulate_scenarios, get_default_scenarios, \
@@ -16,103 +28,149 @@ from visualizations.charts import (
     create_scenario_comparison
 )
 
-try:
-    from visualizations.pdf_report import generate_pdf_report
+# WeasyPrint drags in cairo/pango at import; probe for it cheaply here
+# and import the report module only when an export actually runs
+PDF_AVAILABLE = find_spec("weasyprint") is not None
 
-    PDF_AVAILABLE = True
-except:
-    PDF_AVAILABLE = False
+from llm.chat import get_suggested_questions
+from llm.tool_schemas import CHAT_TOOLS
 
+logging.basicConfig(level=logging.WARNING)
+log = logging.getLogger("portfolio_app")
 
-    def generate_pdf_report(*args, **kwargs):
+# Scenario definitions are static, so index them by name once instead of
+# rebuilding the list and scanning it on every run. apply_scenario_to_all
+# mutates stock_changes, so lookups hand out a per-call copy.
+_SCENARIOS_BY_NAME = {s['name']: s for s in get_default_scenarios()}
+_SCENARIO_DEFAULT_CHANGES = {"Market Crash (-20%)": -20, "Market Rally (+15%)": 15}
+
+
+def _scenario_for(scenario_name):
+    """Fresh copy of a named scenario, or None if unknown"""
+    scenario = _SCENARIOS_BY_NAME.get(scenario_name)
+    if scenario is None:
         return None
+    return {'name': scenario['name'], 'stock_changes': dict(scenario['stock_changes'])}
+
+
+# ========== MCP TOOL DISPATCH ==========
+# The tools run in-process against the modules imported at the top of
+# this file; no companion server subprocess is spawned. (mcp_server.py
+# still exists for external MCP clients via llm.mcp_client.)
+MCP_AVAILABLE = True
+
+
+def _tool_analyze(portfolio_data, kwargs):
+    # Just return the portfolio data that's already processed
+    return {
+        "family": portfolio_data.get('family', {}),
+        "members": portfolio_data.get('members', []),
+        "overlaps": portfolio_data.get('overlaps', {}),
+        "family_holdings": portfolio_data.get('family_holdings', {})
+    }
+
+
+def _tool_optimize(portfolio_data, kwargs):
+    method = kwargs.get('method', 'max_sharpe')
+    result = optimize_family_portfolio(portfolio_data, method=method)
+    if result:
+        return {
+            "current": result['current'],
+            "optimized": result['optimized'],
+            "improvement": result['improvement'],
+            "trades": result['trades'][:10]
+        }
+    return {"error": "Optimization failed"}
+
+
+def _tool_risk(portfolio_data, kwargs):
+    risk_data = analyze_portfolio_risk(portfolio_data)
+    return {
+        "concentration_risk": risk_data['concentration_risk'],
+        "var": risk_data['var'],
+        "cvar": risk_data['cvar'],
+        "risk_contributions": risk_data['risk_contributions'][:5]
+    }
+
 
-from llm.chat import get_chat_instance
+def _tool_scenario(portfolio_data, kwargs):
+    scenario_name = kwargs.get('scenario', 'Market Crash (-20%)')
+    scenario = _scenario_for(scenario_name)
+    if scenario is not None:
+        all_symbols = list(portfolio_data['family_holdings'].keys())
+        default_change = _SCENARIO_DEFAULT_CHANGES.get(scenario_name, 0)
+
+        scenario = apply_scenario_to_all(scenario, all_symbols, default_change)
+        results = simulate_scenarios(portfolio_data, [scenario])
+
+        if results:
+            return results[0]
+    return {"error": "Scenario not found"}
 
-# ========== MCP SERVER STARTUP ==========
-try:
-    mcp_process = subprocess.Popen(["python", "mcp_server.py"],
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
-    atexit.register(mcp_process.terminate)
-    MCP_AVAILABLE = True
-    print("✅ MCP server started successfully")
-except Exception as e:
-    print(f"⚠️ Warning: Could not start MCP server: {e}")
-    MCP_AVAILABLE = False
+
+# O(1) name dispatch instead of an if/elif walk per call
+_MCP_TOOLS = {
+    "analyze_portfolio": _tool_analyze,
+    "optimize_portfolio": _tool_optimize,
+    "analyze_risk": _tool_risk,
+    "run_scenario": _tool_scenario,
+}
 
 
-# ========== MCP TOOL FUNCTIONS (Direct Import) ==========
 def call_mcp_tool(tool_name, **kwargs):
-    """Call MCP tool functions directly without client protocol"""
+    """Call MCP tool functions directly without client protocol
+
+    In-process callers pass portfolio_data as a dict and skip JSON
+    entirely; portfolio_json is accepted for schema compatibility with
+    payloads produced by the model.
+    """
+    tool = _MCP_TOOLS.get(tool_name)
+    if tool is None:
+        return {"error": f"Unknown tool: {tool_name}"}
     try:
-        # Import the actual MCP server functions
-        from portfolio.aggregator import process_portfolio_data
-        from portfolio.optimizer import optimize_family_portfolio
-        from portfolio.risk_analyzer import analyze_portfolio_risk, simulate_scenarios, get_default_scenarios
-
-        if 'portfolio_json' in kwargs:
-            portfolio_data = json.loads(kwargs['portfolio_json'])
+        if 'portfolio_data' in kwargs:
+            portfolio_data = kwargs['portfolio_data']
+        elif 'portfolio_json' in kwargs:
+            portfolio_data = orjson.loads(kwargs['portfolio_json'])
         else:
             return {"error": "No portfolio_json provided"}
 
-        if tool_name == "analyze_portfolio":
-            # Just return the portfolio data that's already processed
-            return {
-                "family": portfolio_data.get('family', {}),
-                "members": portfolio_data.get('members', []),
-                "overlaps": portfolio_data.get('overlaps', {}),
-                "family_holdings": portfolio_data.get('family_holdings', {})
-            }
-
-        elif tool_name == "optimize_portfolio":
-            method = kwargs.get('method', 'max_sharpe')
-            result = optimize_family_portfolio(portfolio_data, method=method)
-            if result:
-                return {
-                    "current": result['current'],
-                    "optimized": result['optimized'],
-                    "improvement": result['improvement'],
-                    "trades": result['trades'][:10]
-                }
-            return {"error": "Optimization failed"}
-
-        elif tool_name == "analyze_risk":
-            risk_data = analyze_portfolio_risk(portfolio_data)
-            return {
-                "concentration_risk": risk_data['concentration_risk'],
-                "var": risk_data['var'],
-                "cvar": risk_data['cvar'],
-                "risk_contributions": risk_data['risk_contributions'][:5]
-            }
-
-        elif tool_name == "run_scenario":
-            scenario_name = kwargs.get('scenario', 'Market Crash (-20%)')
-            scenarios = get_default_scenarios()
-            for scenario in scenarios:
-                if scenario['name'] == scenario_name:
-                    all_symbols = list(portfolio_data['family_holdings'].keys())
-                    scenario_map = {"Market Crash (-20%)": -20, "Market Rally (+15%)": 15}
-                    default_change = scenario_map.get(scenario_name, 0)
-
-                    # Apply scenario
-                    from portfolio.risk_analyzer import apply_scenario_to_all
-                    scenario = apply_scenario_to_all(scenario, all_symbols, default_change)
-                    results = simulate_scenarios(portfolio_data, [scenario])
-
-                    if results:
-                        return results[0]
-            return {"error": "Scenario not found"}
-
-        else:
-            return {"error": f"Unknown tool: {tool_name}"}
+        return tool(portfolio_data, kwargs)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("MCP tool %s failed", tool_name)
         return {"error": str(e)}
 
 
+# Tool results memoized by portfolio content, so repeat clicks on an
+# unchanged portfolio are dict lookups instead of a full recomputation.
+# Content keying makes stale entries impossible; the size cap just
+# bounds memory.
+_mcp_result_cache = {}
+
+
+def call_mcp_tool_cached(tool_name, portfolio_data, **kwargs):
+    """call_mcp_tool with results memoized per portfolio content and args"""
+    pkey = portfolio_cache_key(portfolio_data)
+    key = (tool_name, pkey, tuple(sorted(kwargs.items())))
+    result = _mcp_result_cache.get(key)
+    if result is None:
+        if len(_mcp_result_cache) >= 128:
+            _mcp_result_cache.clear()
+        result = call_mcp_tool(tool_name, portfolio_data=portfolio_data, **kwargs)
+        _mcp_result_cache[key] = result
+    # Hand out a copy so callers cannot mutate the cached entry
+    return copy.deepcopy(result)
+
+
+@lru_cache(maxsize=4)
+def _anthropic_client(api_key):
+    """One Anthropic client per api key, keeping its HTTP connection pool
+    (and TLS session) alive across chat turns"""
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key)
+
+
 # ========== MCP QUICK ACTION HANDLER ==========
 def handle_quick_action(action_name, portfolio_data, chat_history):
     """Handle MCP quick action buttons - returns dict format for Gradio Chatbot"""
@@ -121,34 +179,34 @@ def handle_quick_action(action_name, portfolio_data, chat_history):
 
     if not portfolio_data:
         response = "⚠️ Please analyze a portfolio first."
-        return chat_history + [{"role": "user", "content": action_name}, {"role": "assistant", "content": response}]
+        chat_history.extend([{"role": "user", "content": action_name}, {"role": "assistant", "content": response}])
+        return chat_history
 
     if not MCP_AVAILABLE:
         response = "⚠️ MCP server is not available."
-        return chat_history + [{"role": "user", "content": action_name}, {"role": "assistant", "content": response}]
+        chat_history.extend([{"role": "user", "content": action_name}, {"role": "assistant", "content": response}])
+        return chat_history
 
     try:
-        portfolio_json = json.dumps(portfolio_data)
-
         if "Analyze" in action_name:
-            result = call_mcp_tool("analyze_portfolio", portfolio_json=portfolio_json)
+            result = call_mcp_tool_cached("analyze_portfolio", portfolio_data)
         elif "Optimize" in action_name:
-            result = call_mcp_tool("optimize_portfolio", portfolio_json=portfolio_json, method="max_sharpe")
+            result = call_mcp_tool_cached("optimize_portfolio", portfolio_data, method="max_sharpe")
         elif "Risk" in action_name:
-            result = call_mcp_tool("analyze_risk", portfolio_json=portfolio_json)
+            result = call_mcp_tool_cached("analyze_risk", portfolio_data)
         elif "Scenario" in action_name:
-            result = call_mcp_tool("run_scenario", portfolio_json=portfolio_json, scenario="Market Crash (-20%)")
+            result = call_mcp_tool_cached("run_scenario", portfolio_data, scenario="Market Crash (-20%)")
         else:
             result = {"error": "Unknown action"}
 
         # Format response nicely
-        response = json.dumps(result, indent=2)
-        return chat_history + [{"role": "user", "content": action_name},
-                               {"role": "assistant", "content": f"```json\n{response}\n```"}]
-
+        response = orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+        chat_history.extend([{"role": "user", "content": action_name},
+                             {"role": "assistant", "content": f"```json\n{response}\n```"}])
     except Exception as e:
-        return chat_history + [{"role": "user", "content": action_name},
-                               {"role": "assistant", "content": f"❌ Error: {str(e)}"}]
+        chat_history.extend([{"role": "user", "content": action_name},
+                             {"role": "assistant", "content": f"❌ Error: {str(e)}"}])
+    return chat_history
 
 
 # ========== HARDCODED PORTFOLIO ==========
@@ -190,106 +248,337 @@ HARDCODED_JSON = {
     ]
 }
 
-portfolio_state = {}
-charts_state = {}
-optimization_state = {}
-risk_state = {}
+# ========== SESSION STATE ==========
+# Slotted dataclasses instead of ad-hoc string-keyed dicts: attribute
+# access skips the per-read hash lookup and the instances are smaller,
+# which matters on the callback hot path that touches them every event.
+
+@dataclass(slots=True)
+class ChartsState:
+    """Per-session cache of the most recently built figures"""
+    treemap: object = None
+    member_comparison: object = None
+    overlap: object = None
+    risk: object = None
+    member_treemap: object = None
+    efficient_frontier: object = None
+    weights_comparison: object = None
+    rebalancing_table: object = None
+    correlation: object = None
+    risk_contribution: object = None
+    view_cache: dict = field(default_factory=dict)
+
+    def figures(self):
+        """Built figures as a name -> figure dict for the PDF report"""
+        return {name: fig for name in _CHART_FIELDS
+                if (fig := getattr(self, name)) is not None}
+
+
+_CHART_FIELDS = tuple(f.name for f in fields(ChartsState) if f.name != 'view_cache')
+
+
+@dataclass(slots=True)
+class OptimizationState:
+    """Per-session optimization result for PDF export"""
+    result: object = None
+
+
+@dataclass(slots=True)
+class RiskState:
+    """Per-session risk analysis result for PDF export"""
+    data: object = None
+
+
+# ========== PORTFOLIO INPUT ==========
+# Shared empty/invalid-input prefix so the default-state click returns
+# prebuilt objects instead of allocating nine placeholders per call; the
+# session charts state is appended per call
+_EMPTY_INPUT_RESPONSE = ("⚠️ Please upload a JSON file or paste portfolio JSON",
+                         gr.update(), None, None, None, None, None, None, gr.update())
+# Placeholder tail shared by the error returns (everything after the
+# status message, before the session charts state)
+_ERROR_TAIL = (gr.update(), None, None, None, None, None, None, gr.update())
+
+
+def portfolio_cache_key(portfolio_data):
+    """Stable key for caching charts/results derived from a portfolio payload"""
+    return hash(orjson.dumps(
+        portfolio_data,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    ))
+
+
+# The four overview figures keyed by portfolio content. Re-analyzing an
+# unchanged portfolio (or the same one in another session) reuses the
+# built figures; figure construction is pure Python tree-building and the
+# charts are never mutated after creation, so sharing is safe.
+_overview_figs_cache = {}
+
+
+def process_input(file_input, json_text, charts):
+    """Parse uploaded/pasted portfolio JSON and run the full analysis pipeline"""
+    if charts is None:
+        charts = ChartsState()
+    try:
+        if file_input is not None:
+            # Context-managed binary read avoids leaking the handle; the raw
+            # buffer goes straight into the one-pass decoder
+            with open(file_input, 'rb') as f:
+                buf = f.read()
+        elif json_text and not json_text.isspace():
+            buf = json_text.encode()
+        else:
+            return (*_EMPTY_INPUT_RESPONSE, charts, gr.update())
+
+        json_data, error = decode_portfolio_json(buf)
+        if error:
+            return (f"❌ Invalid portfolio: {error}", *_ERROR_TAIL, charts, gr.update())
 
+        portfolio_data = process_portfolio_data(json_data)
 
-# ========== UI HELPER FUNCTIONS ==========
-def create_metrics_bar_html(portfolio_data):
-    family = portfolio_data['family']
-    risk_score = family['risk_score']
-    risk_class = 'gold' if risk_score < 6 else ''
+        pkey = portfolio_cache_key(portfolio_data)
+        cached_figs = _overview_figs_cache.get(pkey)
+        if cached_figs is not None:
+            treemap, member_comparison, overlap_chart, risk_chart = cached_figs
+        else:
+            # The four figures are independent, so build them concurrently
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                treemap_f = executor.submit(create_family_treemap, portfolio_data)
+                comparison_f = executor.submit(create_member_comparison_bar, portfolio_data['members'])
+                overlap_f = executor.submit(create_overlap_chart, portfolio_data['overlaps'])
+                risk_f = executor.submit(create_risk_indicator, portfolio_data['family']['risk_score'])
+                treemap = treemap_f.result()
+                member_comparison = comparison_f.result()
+                overlap_chart = overlap_f.result()
+                risk_chart = risk_f.result()
+            if len(_overview_figs_cache) >= 8:
+                _overview_figs_cache.clear()
+            _overview_figs_cache[pkey] = (treemap, member_comparison, overlap_chart, risk_chart)
+        charts.treemap = treemap
+        charts.member_comparison = member_comparison
+        charts.overlap = overlap_chart
+        charts.risk = risk_chart
+
+        member_names = [m['name'] for m in portfolio_data['members']]
+        # Suggestions computed in the same invocation: one callback hop
+        # instead of a chained .then() round-trip after analysis
+        return ("✅ Portfolio analyzed!", create_metrics_bar_html(portfolio_data), treemap, member_comparison,
+                overlap_chart, risk_chart, None, portfolio_data,
+                gr.update(choices=member_names, value=member_names[0] if member_names else None), charts,
+                refresh_suggested_questions(portfolio_data))
+
+    except Exception as e:
+        return (f"❌ Error: {str(e)}", *_ERROR_TAIL, charts, gr.update())
 
-    return f'''
+
+# ========== UI HELPER FUNCTIONS ==========
+_METRICS_TEMPLATE = '''
     <div class="metrics-bar">
         <div class="metrics-grid">
             <div class="metric-card">
                 <div class="metric-label">Total Value</div>
-                <div class="metric-value">₹{family['total_value'] / 100000:.2f}L</div>
-                <div class="metric-subvalue">{family['total_gain_pct']:+.2f}%</div>
+                <div class="metric-value">₹{total_value_lakh:.2f}L</div>
+                <div class="metric-subvalue">{total_gain_pct:+.2f}%</div>
             </div>
             <div class="metric-card {risk_class}">
                 <div class="metric-label">Risk Score</div>
-                <div class="metric-value">{family['risk_score']:.1f}/10</div>
-                <div class="metric-subvalue">{'Low' if risk_score < 4 else 'Moderate' if risk_score < 7 else 'High'}</div>
+                <div class="metric-value">{risk_score:.1f}/10</div>
+                <div class="metric-subvalue">{risk_label}</div>
             </div>
             <div class="metric-card">
                 <div class="metric-label">Diversification</div>
-                <div class="metric-value">{family['metrics']['diversification_score']:.1f}/10</div>
-                <div class="metric-subvalue">Sharpe: {family['metrics']['sharpe_ratio']:.2f}</div>
+                <div class="metric-value">{diversification:.1f}/10</div>
+                <div class="metric-subvalue">Sharpe: {sharpe:.2f}</div>
             </div>
             <div class="metric-card">
                 <div class="metric-label">Family Members</div>
-                <div class="metric-value">{family['member_count']}</div>
-                <div class="metric-subvalue">{family['unique_stocks']} stocks</div>
+                <div class="metric-value">{member_count}</div>
+                <div class="metric-subvalue">{unique_stocks} stocks</div>
             </div>
         </div>
     </div>
     '''
 
+# Rendered bars keyed by portfolio content, so Gradio re-renders (tab
+# switches, theme toggles) are a dict lookup instead of re-formatting
+_metrics_html_cache = {}
+
+
+def create_metrics_bar_html(portfolio_data):
+    pkey = portfolio_cache_key(portfolio_data)
+    html = _metrics_html_cache.get(pkey)
+    if html is None:
+        family = portfolio_data['family']
+        metrics = family['metrics']
+        risk_score = family['risk_score']
+        if len(_metrics_html_cache) >= 16:
+            _metrics_html_cache.clear()
+        html = _METRICS_TEMPLATE.format(
+            total_value_lakh=family['total_value'] / 100000,
+            total_gain_pct=family['total_gain_pct'],
+            risk_class='gold' if risk_score < 6 else '',
+            risk_score=risk_score,
+            risk_label='Low' if risk_score < 4 else 'Moderate' if risk_score < 7 else 'High',
+            diversification=metrics['diversification_score'],
+            sharpe=metrics['sharpe_ratio'],
+            member_count=family['member_count'],
+            unique_stocks=family['unique_stocks'],
+        )
+        _metrics_html_cache[pkey] = html
+    return html
+
+
+# One flat holdings frame per portfolio, every member's rows tagged and
+# indexed by member name; individual views slice it instead of rebuilding
+# a DataFrame from the holding dicts on each toggle
+_member_holdings_cache = {}
+
+# Name-to-member index per portfolio, replacing a linear scan of the
+# members list on every individual-view change
+_members_by_name_cache = {}
+
+
+def _member_by_name(portfolio_data, pkey, member_name):
+    index = _members_by_name_cache.get(pkey)
+    if index is None:
+        if len(_members_by_name_cache) >= 8:
+            _members_by_name_cache.clear()
+        index = {m['name']: m for m in portfolio_data['members']}
+        _members_by_name_cache[pkey] = index
+    return index.get(member_name)
+
 
-def update_view(view_mode, member_name, portfolio_data):
+def _member_holdings_df(portfolio_data, pkey):
+    df = _member_holdings_cache.get(pkey)
+    if df is None:
+        rows = [dict(h, member=m['name'])
+                for m in portfolio_data['members'] for h in m['holdings']]
+        df = pd.DataFrame(rows).set_index('member')
+        if len(_member_holdings_cache) >= 8:
+            _member_holdings_cache.clear()
+        _member_holdings_cache[pkey] = df
+    return df
+
+
+def update_view(view_mode, member_name, portfolio_data, charts, last_view):
     if not portfolio_data:
-        return None, None, None
+        return None, None, None, charts, last_view
+    # Both change events bind here with the same inputs, so a dropdown event
+    # that doesn't actually change the selection is a pure no-op
+    if last_view == (view_mode, member_name):
+        return gr.skip(), gr.skip(), gr.skip(), charts, last_view
+    last_view = (view_mode, member_name)
+    if charts is None:
+        charts = ChartsState()
+
+    # Figures only depend on (portfolio, view, member) — serve repeated
+    # toggles from the per-session cache instead of rebuilding Plotly figures
+    pkey = portfolio_cache_key(portfolio_data)
+    cache = charts.view_cache
+    cache_key = (pkey, view_mode, member_name if view_mode == "Individual View" else None)
+    if cache_key in cache:
+        return (*cache[cache_key], charts, last_view)
+    if len(cache) >= 32:
+        cache.clear()
 
     if view_mode == "Family View":
-        treemap = create_family_treemap(portfolio_data)
-        member_comparison = create_member_comparison_bar(portfolio_data['members'])
-        family_holdings_list = []
-        for symbol, data in portfolio_data['family_holdings'].items():
-            family_holdings_list.append({
-                'symbol': symbol, 'quantity': data['quantity'],
-                'current_price': portfolio_data['members'][0]['holdings'][0]['current_price'] if portfolio_data[
-                    'members'] else 0,
-                'value': data['value'], 'weight': data['weight'], 'gain_pct': 0
-            })
-        table = create_holdings_table(family_holdings_list)
-        return treemap, member_comparison, table
+        # Patch the previous treemap where possible so the browser diffs the
+        # trace arrays instead of rebuilding the plot from scratch
+        treemap = create_family_treemap(portfolio_data, fig=charts.treemap)
+        member_comparison = create_member_comparison_bar(portfolio_data['members'],
+                                                         fig=charts.member_comparison)
+        # Columnar build: one from_dict call plus vectorized column
+        # assignments instead of a per-holding dict loop
+        holdings_df = pd.DataFrame.from_dict(portfolio_data['family_holdings'], orient='index')
+        holdings_df = holdings_df.reset_index().rename(columns={'index': 'symbol'})
+        # Price and gain columns derived in C from the aggregated values:
+        # value/quantity is the true per-symbol price rather than the first
+        # member's first holding, and gain comes from the tracked cost
+        qty = holdings_df['quantity'].to_numpy(dtype=float)
+        val = holdings_df['value'].to_numpy(dtype=float)
+        cost = (holdings_df['cost'].to_numpy(dtype=float)
+                if 'cost' in holdings_df.columns else np.zeros_like(val))
+        holdings_df['current_price'] = np.divide(val, qty, out=np.zeros_like(val), where=qty > 0)
+        holdings_df['gain_pct'] = np.divide((val - cost) * 100, cost,
+                                            out=np.zeros_like(val), where=cost > 0)
+        table = create_holdings_table(holdings_df)
+        charts.treemap = treemap
+        charts.member_comparison = member_comparison
+        cache[cache_key] = (treemap, member_comparison, table)
+        return treemap, member_comparison, table, charts, last_view
     else:
-        member_data = next((m for m in portfolio_data['members'] if m['name'] == member_name), None)
+        member_data = _member_by_name(portfolio_data, pkey, member_name)
         if not member_data:
-            return None, None, None
-        treemap = create_member_treemap(member_data)
+            return None, None, None, charts, last_view
+        treemap = create_member_treemap(member_data, fig=charts.member_treemap)
         pie_chart = create_allocation_pie(member_data['holdings'], f"{member_data['name']}'s Allocation")
-        table = create_holdings_table(member_data['holdings'])
-        return treemap, pie_chart, table
+        # .loc[[name]] is a cheap slice of the shared per-portfolio frame
+        table = create_holdings_table(_member_holdings_df(portfolio_data, pkey).loc[[member_name]])
+        charts.member_treemap = treemap
+        cache[cache_key] = (treemap, pie_chart, table)
+        return treemap, pie_chart, table, charts, last_view
 
 
 def toggle_member_dropdown(view_mode):
     return gr.update(visible=(view_mode == "Individual View"))
 
 
+def on_view_change(view_mode, member_name, portfolio_data, charts, last_view):
+    """Single handler for view toggles: dropdown visibility plus the three
+    plots in one callback, instead of two registrations per change event"""
+    return (toggle_member_dropdown(view_mode),
+            *update_view(view_mode, member_name, portfolio_data, charts, last_view))
+
+
 # ========== PORTFOLIO ANALYSIS FUNCTIONS ==========
-def run_optimization(portfolio_data, method):
+_frontier_pool = None
+
+
+def get_frontier_pool():
+    """Lazily create the background pool for the efficient-frontier sweep"""
+    global _frontier_pool
+    if _frontier_pool is None:
+        _frontier_pool = ProcessPoolExecutor(max_workers=2)
+        atexit.register(_frontier_pool.shutdown)
+    return _frontier_pool
+
+
+def run_optimization(portfolio_data, method, charts, optimization):
+    if charts is None:
+        charts = ChartsState()
+    if optimization is None:
+        optimization = OptimizationState()
     if not portfolio_data:
-        return "❌ No portfolio data", None, None, None, ""
+        return "❌ No portfolio data", None, None, None, "", charts, optimization
     try:
-        global optimization_state, charts_state
         method_map = {"Max Sharpe Ratio": "max_sharpe", "Min Volatility": "min_volatility",
                       "Equal Weight": "equal_weight"}
+        # Kick the 30-point Markowitz sweep onto a worker process so it runs
+        # alongside the main solve instead of serially on the request thread
+        all_symbols = list(portfolio_data['family_holdings'].keys())
+        frontier_future = get_frontier_pool().submit(generate_efficient_frontier, all_symbols, 30)
         result = optimize_family_portfolio(portfolio_data, method=method_map.get(method, "max_sharpe"))
         if not result:
-            return "❌ Optimization failed", None, None, None, ""
-        optimization_state['result'] = result
-        all_symbols = list(portfolio_data['family_holdings'].keys())
-        frontier = generate_efficient_frontier(all_symbols, n_points=30)
-        frontier_plot = create_efficient_frontier(frontier, result['current'],
-                                                  result['optimized']) if frontier else None
+            frontier_future.cancel()
+            return "❌ Optimization failed", None, None, None, "", charts, optimization
+        optimization.result = result
+        frontier = frontier_future.result()
+        frontier_plot = create_efficient_frontier(frontier, result['current'], result['optimized'],
+                                                  fig=charts.efficient_frontier) if frontier else None
         weights_plot = create_weights_comparison(result['current']['weights'], result['optimized']['weights'])
         trades_table = create_rebalancing_table(result['trades'])
-        charts_state.update({'efficient_frontier': frontier_plot, 'weights_comparison': weights_plot,
-                             'rebalancing_table': trades_table})
+        charts.efficient_frontier = frontier_plot
+        charts.weights_comparison = weights_plot
+        charts.rebalancing_table = trades_table
         improvement = result['improvement']
         metrics_text = f"""### Optimization Results
 **Current:** Return {result['current']['expected_return'] * 100:.2f}%, Vol {result['current']['volatility'] * 100:.2f}%, Sharpe {result['current']['sharpe_ratio']:.4f}
 **Optimized:** Return {result['optimized']['expected_return'] * 100:.2f}%, Vol {result['optimized']['volatility'] * 100:.2f}%, Sharpe {result['optimized']['sharpe_ratio']:.4f}
 **Improvements:** Return {improvement['return_change'] * 100:+.2f}%, Vol {improvement['volatility_change'] * 100:+.2f}%, Sharpe {improvement['sharpe_change']:+.4f}
 **Trades Required:** {len(result['trades'])}"""
-        return "✅ Optimization complete!", frontier_plot, weights_plot, trades_table, metrics_text
+        return "✅ Optimization complete!", frontier_plot, weights_plot, trades_table, metrics_text, charts, optimization
     except Exception as e:
-        return f"❌ Error: {str(e)}", None, None, None, ""
+        return f"❌ Error: {str(e)}", None, None, None, "", charts, optimization
 
 
 def run_scenario_analysis(portfolio_data, scenario_name):
@@ -297,37 +586,40 @@ def run_scenario_analysis(portfolio_data, scenario_name):
         return None, "❌ No portfolio data"
     try:
         all_symbols = list(portfolio_data['family_holdings'].keys())
-        scenarios = get_default_scenarios()
-        scenario_map = {"Market Crash (-20%)": -20, "Market Rally (+15%)": 15, "Tech Selloff": 0, "Banking Rally": 0}
-        default_change = scenario_map.get(scenario_name, 0)
-        for scenario in scenarios:
-            if scenario['name'] == scenario_name:
-                scenario = apply_scenario_to_all(scenario, all_symbols, default_change)
-                results = simulate_scenarios(portfolio_data, [scenario])
-                if results:
-                    result = results[0]
-                    comparison_plot = create_scenario_comparison(results)
-                    details = f"""### Scenario: {scenario_name}
+        default_change = _SCENARIO_DEFAULT_CHANGES.get(scenario_name, 0)
+        scenario = _scenario_for(scenario_name)
+        if scenario is not None:
+            scenario = apply_scenario_to_all(scenario, all_symbols, default_change)
+            results = simulate_scenarios(portfolio_data, [scenario])
+            if results:
+                result = results[0]
+                comparison_plot = create_scenario_comparison(results)
+                details = f"""### Scenario: {scenario_name}
 **Current:** ₹{result['current_value']:,.2f}
 **Projected:** ₹{result['scenario_value']:,.2f}
 **Change:** ₹{result['value_change']:+,.2f} ({result['pct_change']:+.2f}%)
 {"🔴 Portfolio would decrease" if result['pct_change'] < 0 else "🟢 Portfolio would increase"}"""
-                    return comparison_plot, details
+                return comparison_plot, details
         return None, "❌ Scenario not found"
     except Exception as e:
         return None, f"❌ Error: {str(e)}"
 
 
-def run_risk_analysis(portfolio_data):
+def run_risk_analysis(portfolio_data, charts, risk):
+    if charts is None:
+        charts = ChartsState()
+    if risk is None:
+        risk = RiskState()
     if not portfolio_data:
-        return None, None, "", ""
+        return None, None, "", "", charts, risk
     try:
-        global risk_state, charts_state
         risk_data = analyze_portfolio_risk(portfolio_data)
-        risk_state['data'] = risk_data
-        corr_heatmap = create_correlation_heatmap(risk_data['correlation_matrix'])
+        risk.data = risk_data
+        corr_heatmap = create_correlation_heatmap(risk_data['correlation_matrix'],
+                                                  fig=charts.correlation)
         risk_contrib_chart = create_risk_contribution_chart(risk_data['risk_contributions'])
-        charts_state.update({'correlation': corr_heatmap, 'risk_contribution': risk_contrib_chart})
+        charts.correlation = corr_heatmap
+        charts.risk_contribution = risk_contrib_chart
         conc = risk_data['concentration_risk']
         conc_text = f"""### Concentration Risk
 **HHI:** {conc['hhi']:.2f} | **Top 1:** {conc['top_1_concentration']:.1f}% | **Top 3:** {conc['top_3_concentration']:.1f}%
@@ -341,160 +633,173 @@ def run_risk_analysis(portfolio_data):
 **Daily CVaR:** {cvar['daily_cvar'] * 100:.2f}% | **Annual CVaR:** {cvar['annual_cvar'] * 100:.2f}%"""
         else:
             var_text = "### Value at Risk\nInsufficient data"
-        return corr_heatmap, risk_contrib_chart, conc_text, var_text
+        return corr_heatmap, risk_contrib_chart, conc_text, var_text, charts, risk
     except Exception as e:
-        return None, None, f"❌ Error: {str(e)}", ""
+        return None, None, f"❌ Error: {str(e)}", "", charts, risk
+
+
+_pdf_pool = None
 
 
-def export_to_pdf(portfolio_data):
+def get_pdf_pool():
+    """Lazily create the single-worker pool for WeasyPrint rendering"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=1)
+        atexit.register(_pdf_pool.shutdown)
+    return _pdf_pool
+
+
+def export_to_pdf(portfolio_data, charts, optimization, risk):
+    # Visibility is decided here, in the same callback that knows whether a
+    # file exists — no follow-up round-trip just to toggle the component
     if not PDF_AVAILABLE or not portfolio_data:
-        return None, "❌ PDF export unavailable"
+        return gr.update(visible=False), "❌ PDF export unavailable"
     try:
-        global charts_state, optimization_state, risk_state
         output_path = f"/mnt/user-data/outputs/portfolio_report.pdf"
-        pdf_path = generate_pdf_report(portfolio_data, charts_state, optimization_state.get('result'),
-                                       risk_state.get('data'), output_path)
-        return pdf_path, "✅ PDF generated!" if pdf_path else "❌ PDF generation failed"
+        # WeasyPrint layout is CPU-bound; render in a worker process so the
+        # export does not hold the GIL against other sessions
+        from visualizations.pdf_report import generate_pdf_report
+        pdf_path = get_pdf_pool().submit(generate_pdf_report, portfolio_data,
+                                         charts.figures() if charts else {},
+                                         optimization.result if optimization else None,
+                                         risk.data if risk else None,
+                                         output_path).result()
+        return (gr.update(value=pdf_path, visible=bool(pdf_path)),
+                "✅ PDF generated!" if pdf_path else "❌ PDF generation failed")
     except Exception as e:
-        return None, f"❌ Error: {str(e)}"
+        return gr.update(visible=False), f"❌ Error: {str(e)}"
 
 
 # ========== AI CHAT FUNCTIONS ==========
+# Content-addressed, so safe to share across sessions: identical portfolios
+# always produce identical suggestions
+_suggested_questions_cache = {}
+
+
 def refresh_suggested_questions(portfolio_data):
     if not portfolio_data:
         return gr.update(choices=["What is a good portfolio?", "How to diversify?", "What is Sharpe ratio?"])
-    chat = get_chat_instance()
-    return gr.update(choices=chat.get_suggested_questions(portfolio_data))
-
-
-def send_chat(msg, history, portfolio_data, api_key):
-    """Enhanced chat with MCP tool support"""
+    pkey = portfolio_cache_key(portfolio_data)
+    suggestions = _suggested_questions_cache.get(pkey)
+    if suggestions is None:
+        suggestions = get_suggested_questions(portfolio_data)
+        if len(_suggested_questions_cache) >= 16:
+            _suggested_questions_cache.clear()
+        _suggested_questions_cache[pkey] = suggestions
+    return gr.update(choices=suggestions)
+
+
+def send_chat(msg, history, portfolio_data, api_key, chat_messages):
+    """Enhanced chat with MCP tool support, streaming tokens as they arrive"""
     if not msg:
-        return history, ""
+        yield history, "", chat_messages
+        return
     if not history:
         history = []
+    if chat_messages is None:
+        chat_messages = []
 
     api_key = api_key if api_key and api_key.startswith("sk-ant-") else os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
-        return history + [{"role": "user", "content": msg}, {"role": "assistant", "content": "⚠️ API key required"}], ""
+        history.extend([{"role": "user", "content": msg},
+                        {"role": "assistant", "content": "⚠️ API key required"}])
+        yield history, "", chat_messages
+        return
+
+    # Echo the user message immediately; the assistant bubble fills in as
+    # tokens stream instead of blocking for the full Claude round-trip.
+    # The list is mutated in place so Gradio can diff against the same
+    # object instead of re-sending the whole transcript each update.
+    history.extend([{"role": "user", "content": msg}, {"role": "assistant", "content": ""}])
+    yield history, "", chat_messages
 
     try:
-        from anthropic import Anthropic
-        client = Anthropic(api_key=api_key)
-
-        # Define MCP tools for autonomous use
-        tools = [
-            {
-                "name": "analyze_portfolio",
-                "description": "Analyze family portfolio metrics, performance, and overlaps",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {"portfolio_json": {"type": "string"}},
-                    "required": ["portfolio_json"]
-                }
-            },
-            {
-                "name": "optimize_portfolio",
-                "description": "Optimize portfolio allocation for better returns",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "portfolio_json": {"type": "string"},
-                        "method": {"type": "string", "enum": ["max_sharpe", "min_volatility", "equal_weight"],
-                                   "default": "max_sharpe"}
-                    },
-                    "required": ["portfolio_json"]
-                }
-            },
-            {
-                "name": "analyze_risk",
-                "description": "Analyze portfolio risk metrics including VaR and concentration",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {"portfolio_json": {"type": "string"}},
-                    "required": ["portfolio_json"]
-                }
-            },
-            {
-                "name": "run_scenario",
-                "description": "Run what-if scenario analysis on portfolio",
-                "input_schema": {
-                    "type": "object",
-                    "properties": {
-                        "portfolio_json": {"type": "string"},
-                        "scenario": {"type": "string", "default": "Market Crash (-20%)"}
-                    },
-                    "required": ["portfolio_json"]
-                }
-            }
-        ]
-
-        # Build messages (extract from dict format history)
-        messages = []
-        for msg_dict in history:
-            if isinstance(msg_dict, dict):
-                if msg_dict.get('role') == 'user':
-                    messages.append({"role": "user", "content": msg_dict.get('content', '')})
-                elif msg_dict.get('role') == 'assistant':
-                    messages.append({"role": "assistant", "content": msg_dict.get('content', '')})
+        client = _anthropic_client(api_key)
+
+        # The converted API messages persist in session state across turns,
+        # so each turn appends one entry instead of re-walking the whole
+        # visible history. Rebuild only if the two no longer line up
+        # (history cleared or edited outside this handler).
+        if len(chat_messages) != len(history) - 2:
+            chat_messages = [
+                {"role": msg_dict['role'], "content": msg_dict.get('content', '')}
+                for msg_dict in history[:-2]
+                if isinstance(msg_dict, dict) and msg_dict.get('role') in ('user', 'assistant')
+            ]
 
         # Add current message
-        messages.append({
+        chat_messages.append({
             "role": "user",
             "content": f"{msg}\n\n[Portfolio data available]" if portfolio_data else msg
         })
-
-        # Call Claude API with tools
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            tools=tools,
-            messages=messages
-        )
+        messages = list(chat_messages)
+
+        # Call Claude API with tools, streaming tokens into the chat bubble
+        with client.messages.stream(
+                model="claude-sonnet-4-20250514",
+                max_tokens=2000,
+                tools=CHAT_TOOLS,
+                messages=messages
+        ) as stream:
+            for text in stream.text_stream:
+                history[-1]['content'] += text
+                yield history, "", chat_messages
+            response = stream.get_final_message()
 
         # Handle tool use
         if response.stop_reason == "tool_use":
-            tool_block = next((b for b in response.content if b.type == "tool_use"), None)
-
-            if tool_block and portfolio_data and MCP_AVAILABLE:
-                # Call MCP tool
-                tool_input = dict(tool_block.input)
-                tool_input['portfolio_json'] = json.dumps(portfolio_data)
-
-                mcp_result = call_mcp_tool(tool_block.name, **tool_input)
-
-                # Continue conversation with tool result
+            tool_blocks = [b for b in response.content if b.type == "tool_use"]
+
+            if tool_blocks and portfolio_data and MCP_AVAILABLE:
+                # Dispatch every requested tool concurrently so the
+                # round trip costs the slowest call, not the sum. The
+                # session's dict is handed over directly — no dumps/loads
+                # round trip for in-process tools.
+                with ThreadPoolExecutor(max_workers=min(4, len(tool_blocks))) as pool:
+                    futures = [
+                        pool.submit(call_mcp_tool, block.name,
+                                    **{k: v for k, v in dict(block.input).items()
+                                       if k != 'portfolio_json'},
+                                    portfolio_data=portfolio_data)
+                        for block in tool_blocks
+                    ]
+                    mcp_results = [f.result() for f in futures]
+
+                # Continue conversation with one result per tool call
                 messages.append({"role": "assistant", "content": response.content})
                 messages.append({
                     "role": "user",
-                    "content": [{
-                        "type": "tool_result",
-                        "tool_use_id": tool_block.id,
-                        "content": json.dumps(mcp_result)
-                    }]
+                    "content": [
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": block.id,
+                            "content": orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+                        }
+                        for block, result in zip(tool_blocks, mcp_results)
+                    ]
                 })
 
-                # Get final response
-                final_response = client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=2000,
-                    messages=messages
-                )
-
-                response_text = "".join([b.text for b in final_response.content if hasattr(b, 'text')])
+                # Stream the final response after the tool round-trip
+                with client.messages.stream(
+                        model="claude-sonnet-4-20250514",
+                        max_tokens=2000,
+                        messages=messages
+                ) as stream:
+                    for text in stream.text_stream:
+                        history[-1]['content'] += text
+                        yield history, "", chat_messages
             else:
-                response_text = "⚠️ Tools are not available. Please check MCP server."
-        else:
-            # Direct answer
-            response_text = "".join([b.text for b in response.content if hasattr(b, 'text')])
+                history[-1]['content'] = "⚠️ Tools are not available. Please check MCP server."
 
-        # Return in dict format for Gradio Chatbot
-        return history + [{"role": "user", "content": msg}, {"role": "assistant", "content": response_text}], ""
+        # Persist this turn's final assistant text for the next call
+        chat_messages.append({"role": "assistant", "content": history[-1]['content']})
+        yield history, "", chat_messages
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return history + [{"role": "user", "content": msg}, {"role": "assistant", "content": f"❌ Error: {str(e)}"}], ""
+        log.exception("send_chat failed")
+        history[-1]['content'] = f"❌ Error: {str(e)}"
+        yield history, "", chat_messages
 
 
 # ========== CSS ==========
@@ -548,31 +853,146 @@ CSS = """
 }
 """
 
+# Static assets resolved once at import. Gradio re-renders the layout per
+# session, so a per-render loader would pay a stat + read + decode on
+# every page load for content that never changes while the app runs.
+_STATIC_DIR = Path(__file__).parent / "static"
+_CUSTOM_CSS_PATH = _STATIC_DIR / "custom.css"
+_CUSTOM_JS_PATH = _STATIC_DIR / "custom.js"
+
+
+@lru_cache(maxsize=4)
+def _read_static(path, mtime):
+    """Read a static asset, memoized on (path, mtime)
+
+    The mtime key makes the cache self-invalidating: a plain launch reads
+    each file once, while `gradio reload` re-executions during development
+    pick up edits without re-reading unchanged files.
+    """
+    return Path(path).read_text(encoding='utf-8')
+
+
+def _static_text(path):
+    return _read_static(str(path), path.stat().st_mtime) if path.exists() else ""
+
+
+_CUSTOM_CSS = _static_text(_CUSTOM_CSS_PATH)
+_CUSTOM_JS = _static_text(_CUSTOM_JS_PATH)
+_CUSTOM_JS_HTML = f"<script>{_CUSTOM_JS}</script>" if _CUSTOM_JS else ""
+
+
+def _minify_css(css):
+    """Strip comments and collapse whitespace; keeps the inline blob small"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    return re.sub(r'\s+', ' ', css).strip()
+
+
+# Compiled CSS materialized as a static file so the browser caches it
+# across page loads instead of re-downloading an inline <style> blob
+_COMPILED_CSS = _minify_css(CSS + _CUSTOM_CSS)
+_APP_CSS_PATH = _STATIC_DIR / "app.css"
+
+
+def _write_compiled_css():
+    try:
+        if not _APP_CSS_PATH.exists() or _APP_CSS_PATH.read_text(encoding='utf-8') != _COMPILED_CSS:
+            _STATIC_DIR.mkdir(exist_ok=True)
+            _APP_CSS_PATH.write_text(_COMPILED_CSS, encoding='utf-8')
+        return True
+    except OSError:
+        return False
+
+
+# Passed to launch() (Gradio 6 moved css/head there); falls back to
+# inline CSS when the static dir is read-only
+_CSS_KWARGS = ({'css_paths': [_APP_CSS_PATH]} if _write_compiled_css()
+               else {'css': _COMPILED_CSS})
+
 # ========== GRADIO INTERFACE ==========
-with gr.Blocks(title="Portfolio Analytics") as app:
-    # Process hardcoded portfolio on startup
-    portfolio_data = process_portfolio_data(HARDCODED_JSON)
-    portfolio_state = portfolio_data
+_BOOTSTRAP_CACHE_DIR = Path.home() / ".cache" / "portfolio"
+
+
+def _bootstrap_portfolio():
+    """Process the hardcoded portfolio and build its startup figures once
+
+    The result is pickled under ~/.cache/portfolio keyed by a hash of the
+    hardcoded payload, so reloader and multi-worker launches skip the
+    whole pandas/plotly pipeline after the first import. Editing the
+    payload changes the key and naturally invalidates the cache.
+    """
+    key = hashlib.sha1(orjson.dumps(HARDCODED_JSON, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    cache_path = _BOOTSTRAP_CACHE_DIR / f"{key}.pkl"
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass  # stale or truncated cache; fall through and rebuild
 
-    # Load CSS inline
-    gr.HTML(f"<style>{CSS}</style>")
+    portfolio_data = process_portfolio_data(HARDCODED_JSON)
+    # The four startup figures are independent; build them concurrently
+    # like process_input does for the overview charts
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {
+            'treemap': pool.submit(create_family_treemap, portfolio_data),
+            'member_comparison': pool.submit(create_member_comparison_bar, portfolio_data['members']),
+            'overlap': pool.submit(create_overlap_chart, portfolio_data['overlaps']),
+            'risk': pool.submit(create_risk_indicator, portfolio_data['family']['risk_score']),
+        }
+        bootstrap = {name: f.result() for name, f in futures.items()}
+    bootstrap['portfolio_data'] = portfolio_data
+    try:
+        _BOOTSTRAP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(bootstrap, f)
+    except OSError:
+        pass  # cache dir not writable; recompute next launch
+    return bootstrap
 
-    # Generate initial charts
-    treemap = create_family_treemap(portfolio_data)
-    member_comparison = create_member_comparison_bar(portfolio_data['members'])
-    overlap_chart = create_overlap_chart(portfolio_data['overlaps'])
-    risk_chart = create_risk_indicator(portfolio_data['family']['risk_score'])
 
-    charts_state.update(
-        {'treemap': treemap, 'member_comparison': member_comparison, 'overlap': overlap_chart, 'risk': risk_chart})
+with gr.Blocks(title="Portfolio Analytics") as app:
+    # Process hardcoded portfolio on startup (disk-cached across reloads)
+    _bootstrap = _bootstrap_portfolio()
+    portfolio_data = _bootstrap['portfolio_data']
+
+    # Initial charts
+    treemap = _bootstrap['treemap']
+    member_comparison = _bootstrap['member_comparison']
+    overlap_chart = _bootstrap['overlap']
+    risk_chart = _bootstrap['risk']
+
+    # Per-session state (was module-level globals, which leaked across
+    # concurrent Gradio sessions)
+    charts_state = gr.State(value=ChartsState(treemap=treemap, member_comparison=member_comparison,
+                                              overlap=overlap_chart, risk=risk_chart))
+    optimization_state = gr.State(value=OptimizationState())
+    risk_state = gr.State(value=RiskState())
+    last_view_state = gr.State(value=(None, None))
+    # Converted Claude API messages, appended per turn instead of being
+    # rebuilt from the visible chat history on every message
+    chat_messages_state = gr.State(value=[])
 
     # Header
     gr.HTML('<h1 style="text-align: center; color: #1a5e63;">📊 Portfolio Analytics Platform</h1>')
-    gr.HTML(create_metrics_bar_html(portfolio_data))
+    metrics_html = gr.HTML(create_metrics_bar_html(portfolio_data))
 
     # State
     portfolio_data_state = gr.State(value=portfolio_data)
 
+    # Portfolio input
+    with gr.Accordion("📁 Load Portfolio", open=False):
+        with gr.Row():
+            file_input = gr.File(label="Upload Portfolio JSON", file_types=[".json"], type="filepath")
+            json_text_input = gr.Textbox(label="Or Paste JSON", lines=5, scale=2)
+        analyze_btn = gr.Button("Analyze", variant="primary")
+        input_status = gr.Markdown("")
+
+    # View controls
+    with gr.Row():
+        view_mode = gr.Radio(["Family View", "Individual View"], value="Family View", label="View")
+        member_dropdown = gr.Dropdown(choices=[m['name'] for m in portfolio_data['members']],
+                                      label="Family Member", visible=False)
+
     # Main visualizations
     with gr.Row():
         with gr.Column():
@@ -645,13 +1065,29 @@ with gr.Blocks(title="Portfolio Analytics") as app:
     export_btn = gr.Button("📥 Export PDF")
 
     # ========== EVENT HANDLERS ==========
-    optimize_btn.click(run_optimization, [portfolio_data_state, opt_method],
-                       [opt_status, frontier_plot, weights_plot, rebal_table, metrics_comp])
+    # Single canonical Analyze handler: the full validate -> aggregate -> chart
+    # pipeline (including suggested questions) runs exactly once per click
+    analyze_btn.click(process_input, [file_input, json_text_input, charts_state],
+                      [input_status, metrics_html, treemap_plot, comparison_plot, overlap_plot, risk_plot,
+                       holdings_table, portfolio_data_state, member_dropdown, charts_state, suggested])
+    view_mode.change(on_view_change,
+                     [view_mode, member_dropdown, portfolio_data_state, charts_state, last_view_state],
+                     [member_dropdown, treemap_plot, comparison_plot, holdings_table, charts_state,
+                      last_view_state])
+    member_dropdown.change(update_view,
+                           [view_mode, member_dropdown, portfolio_data_state, charts_state, last_view_state],
+                           [treemap_plot, comparison_plot, holdings_table, charts_state, last_view_state])
+
+    optimize_btn.click(run_optimization, [portfolio_data_state, opt_method, charts_state, optimization_state],
+                       [opt_status, frontier_plot, weights_plot, rebal_table, metrics_comp, charts_state,
+                        optimization_state])
     scenario_btn.click(run_scenario_analysis, [portfolio_data_state, scenario_select],
                        [scenario_plot, scenario_details])
-    risk_btn.click(run_risk_analysis, [portfolio_data_state], [corr_heatmap, risk_contrib, conc_metrics, var_metrics])
+    risk_btn.click(run_risk_analysis, [portfolio_data_state, charts_state, risk_state],
+                   [corr_heatmap, risk_contrib, conc_metrics, var_metrics, charts_state, risk_state])
 
-    export_btn.click(export_to_pdf, [portfolio_data_state], [pdf_output, export_status])
+    export_btn.click(export_to_pdf, [portfolio_data_state, charts_state, optimization_state, risk_state],
+                     [pdf_output, export_status])
 
     # MCP Quick Actions
     if MCP_AVAILABLE:
@@ -677,11 +1113,25 @@ with gr.Blocks(title="Portfolio Analytics") as app:
         )
 
     # Chat handlers
-    send_btn.click(send_chat, [msg_input, chatbot, portfolio_data_state, api_key_input], [chatbot, msg_input])
-    msg_input.submit(send_chat, [msg_input, chatbot, portfolio_data_state, api_key_input], [chatbot, msg_input])
+    send_btn.click(send_chat, [msg_input, chatbot, portfolio_data_state, api_key_input, chat_messages_state],
+                   [chatbot, msg_input, chat_messages_state])
+    msg_input.submit(send_chat, [msg_input, chatbot, portfolio_data_state, api_key_input, chat_messages_state],
+                     [chatbot, msg_input, chat_messages_state])
 
     # Load suggested questions on startup
     app.load(lambda: refresh_suggested_questions(portfolio_data), outputs=[suggested])
 
 if __name__ == "__main__":
-    app.launch(server_name="127.0.0.1", server_port=7860)
+    # uvloop speeds up the asyncio loop Gradio/uvicorn run on; the app
+    # works identically on the stock loop when it isn't installed
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    # Explicit queue so the streaming chat generator flushes partial
+    # tokens to the browser as they arrive rather than in coarse batches
+    app.queue(default_concurrency_limit=8)
+    app.launch(server_name="127.0.0.1", server_port=7860,
+               head=_CUSTOM_JS_HTML or None, **_CSS_KWARGS)
@@ -1,3 +1,5 @@
+import time
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -10,12 +12,13 @@ except ImportError:
     YFINANCE_AVAILABLE = False
     print("Warning: yfinance not available, using mock data")
 
-from database.db_connection import execute_query
+from database.db_connection import execute_query, execute_query_df
+from database.yf_cache import FileCache
 from database.queries import (
     get_historical_prices_query,
     get_latest_price_query,
     get_nifty50_data_query,
-    check_symbols_exist_query
+    symbol_validity_query
 )
 
 # Import mock data if yfinance is unavailable
@@ -24,9 +27,46 @@ if not YFINANCE_AVAILABLE:
 
 DEFAULT_LOOKBACK_DAYS = 252  # ~1 year of trading days
 
+# On-disk TTL cache in front of yfinance: prices go a little stale
+# within the TTL, history barely moves intraday
+_yf_cache = FileCache()
+PRICE_TTL = 900  # 15 minutes
+HISTORY_TTL = 3600  # 1 hour
+
+# In-memory TTL memo in front of both the Postgres and yfinance paths:
+# within a session the UI keeps asking for the same symbols, so repeat
+# lookups should not leave the process at all
+_memo = {}
+_MEMO_CAP = 256
+
+
+def _memo_get(key, ttl):
+    entry = _memo.get(key)
+    if entry is not None and time.time() - entry[1] <= ttl:
+        return entry[0]
+    return None
+
+
+def _memo_set(key, value):
+    if len(_memo) >= _MEMO_CAP:
+        _memo.clear()
+    _memo[key] = (value, time.time())
+
 
 def get_current_price(symbol):
     """Get current price for a symbol, try PostgreSQL first, then yfinance/mock"""
+    key = ('price', symbol)
+    cached = _memo_get(key, PRICE_TTL)
+    if cached is not None:
+        return cached
+
+    price = _fetch_current_price(symbol)
+    if price is not None:
+        _memo_set(key, price)
+    return price
+
+
+def _fetch_current_price(symbol):
     try:
         # Try PostgreSQL first
         result = execute_query(get_latest_price_query(), (symbol,), fetch_one=True)
@@ -37,11 +77,17 @@ def get_current_price(symbol):
 
     # Fallback to yfinance or mock
     if YFINANCE_AVAILABLE:
+        cache_key = f"price:{symbol}"
+        cached = _yf_cache.get(cache_key, PRICE_TTL)
+        if cached is not None:
+            return cached
         try:
             ticker = yf.Ticker(f"{symbol}.NS")
             hist = ticker.history(period="1d")
             if not hist.empty:
-                return hist['Close'].iloc[-1]
+                price = hist['Close'].iloc[-1]
+                _yf_cache.set(cache_key, price)
+                return price
         except Exception as e:
             print(f"yfinance error for {symbol}: {e}")
     else:
@@ -60,16 +106,26 @@ def get_historical_data(symbols, days=DEFAULT_LOOKBACK_DAYS):
     Get historical OHLCV data for multiple symbols
     Returns: DataFrame with columns [symbol, date, close]
     """
+    key = ('hist', tuple(sorted(symbols)), days)
+    cached = _memo_get(key, HISTORY_TTL)
+    if cached is not None:
+        return cached
+
+    df = _fetch_historical_data(symbols, days)
+    if not df.empty:
+        _memo_set(key, df)
+    return df
+
+
+def _fetch_historical_data(symbols, days):
     end_date = datetime.now().date()
     start_date = end_date - timedelta(days=days * 2)  # Extra buffer for weekends
 
     try:
-        # Try PostgreSQL
-        query = get_historical_prices_query()
-        results = execute_query(query, (symbols, start_date, end_date))
+        # Try PostgreSQL; rows stream straight into a DataFrame
+        df = execute_query_df(get_historical_prices_query(), (symbols, start_date, end_date))
 
-        if results:
-            df = pd.DataFrame(results)
+        if not df.empty:
             df['date'] = pd.to_datetime(df['date'])
             return df
     except Exception as e:
@@ -79,19 +135,44 @@ def get_historical_data(symbols, days=DEFAULT_LOOKBACK_DAYS):
     all_data = []
 
     if YFINANCE_AVAILABLE:
-        for symbol in symbols:
+        tickers = {f"{symbol}.NS": symbol for symbol in symbols}
+        cache_key = f"hist:{','.join(sorted(tickers))}:{days * 2}"
+        batch = _yf_cache.get(cache_key, HISTORY_TTL)
+        if batch is None:
+            batch = pd.DataFrame()
             try:
-                ticker = yf.Ticker(f"{symbol}.NS")
-                hist = ticker.history(period=f"{days * 2}d")
-                if not hist.empty:
-                    hist_df = pd.DataFrame({
-                        'symbol': symbol,
-                        'date': hist.index,
-                        'close': hist['Close'].values
-                    })
-                    all_data.append(hist_df)
+                # One batched request for the whole universe instead of one
+                # HTTPS round-trip per symbol
+                batch = yf.download(list(tickers), period=f"{days * 2}d",
+                                    group_by='ticker', threads=True, progress=False)
+                if not batch.empty:
+                    _yf_cache.set(cache_key, batch)
             except Exception as e:
-                print(f"yfinance error for {symbol}: {e}")
+                print(f"yfinance batch download error: {e}")
+
+        for ticker, symbol in tickers.items():
+            hist = None
+            if isinstance(batch.columns, pd.MultiIndex):
+                if ticker in batch.columns.get_level_values(0):
+                    hist = batch[ticker].dropna(subset=['Close'])
+            elif not batch.empty and len(tickers) == 1:
+                hist = batch.dropna(subset=['Close'])
+
+            if hist is None or hist.empty:
+                # Per-ticker retry only for symbols missing from the batch
+                try:
+                    hist = yf.Ticker(ticker).history(period=f"{days * 2}d")
+                except Exception as e:
+                    print(f"yfinance error for {symbol}: {e}")
+                    continue
+                if hist.empty:
+                    continue
+
+            all_data.append(pd.DataFrame({
+                'symbol': symbol,
+                'date': hist.index,
+                'close': hist['Close'].values
+            }))
     else:
         # Use mock data
         for symbol in symbols:
@@ -110,10 +191,9 @@ def get_nifty50_data(days=DEFAULT_LOOKBACK_DAYS):
     start_date = end_date - timedelta(days=days * 2)
 
     try:
-        # Try PostgreSQL
-        results = execute_query(get_nifty50_data_query(), (start_date, end_date))
-        if results:
-            df = pd.DataFrame(results)
+        # Try PostgreSQL; rows stream straight into a DataFrame
+        df = execute_query_df(get_nifty50_data_query(), (start_date, end_date))
+        if not df.empty:
             df['date'] = pd.to_datetime(df['date'])
             return df
     except Exception as e:
@@ -121,14 +201,20 @@ def get_nifty50_data(days=DEFAULT_LOOKBACK_DAYS):
 
     # Fallback to yfinance or mock
     if YFINANCE_AVAILABLE:
+        cache_key = f"nifty:{days * 2}"
+        cached = _yf_cache.get(cache_key, HISTORY_TTL)
+        if cached is not None:
+            return cached
         try:
             ticker = yf.Ticker("^NSEI")
             hist = ticker.history(period=f"{days * 2}d")
             if not hist.empty:
-                return pd.DataFrame({
+                df = pd.DataFrame({
                     'date': hist.index,
                     'close': hist['Close'].values
                 })
+                _yf_cache.set(cache_key, df)
+                return df
         except Exception as e:
             print(f"yfinance error for Nifty: {e}")
     else:
@@ -139,39 +225,43 @@ def get_nifty50_data(days=DEFAULT_LOOKBACK_DAYS):
 
 
 def calculate_returns(prices_df):
-    """Calculate daily returns from price data"""
-    returns_list = []
+    """Calculate daily returns from price data
 
-    for symbol in prices_df['symbol'].unique():
-        symbol_data = prices_df[prices_df['symbol'] == symbol].sort_values('date')
-
-        # Calculate daily returns
-        symbol_data = symbol_data.copy()
-
-        # Fix timezone issue - convert to naive datetime
-        # Handle both timezone-aware and timezone-naive datetimes
-        symbol_data['date'] = pd.to_datetime(symbol_data['date'])
-        if symbol_data['date'].dt.tz is not None:
-            # If timezone-aware, convert to naive
-            symbol_data['date'] = symbol_data['date'].dt.tz_localize(None)
+    One vectorized pass over the whole frame: a grouped pct_change
+    replaces the old per-symbol filter/copy/concat loop.
+    """
+    if prices_df.empty:
+        return pd.DataFrame(columns=['symbol', 'date', 'return'])
 
-        symbol_data['return'] = symbol_data['close'].pct_change()
-        symbol_data = symbol_data.dropna(subset=['return'])
+    prices_df = prices_df.copy()
 
-        returns_list.append(symbol_data[['symbol', 'date', 'return']])
+    # Fix timezone issue - convert to naive datetime once for the whole
+    # column (handles both timezone-aware and timezone-naive input)
+    prices_df['date'] = pd.to_datetime(prices_df['date'])
+    if prices_df['date'].dt.tz is not None:
+        prices_df['date'] = prices_df['date'].dt.tz_localize(None)
 
-    if returns_list:
-        return pd.concat(returns_list, ignore_index=True)
+    # Stable sort keeps the original date order within each symbol
+    prices_df = prices_df.sort_values(['symbol', 'date'], kind='mergesort')
+    prices_df['return'] = prices_df.groupby('symbol', sort=False)['close'].pct_change()
 
-    return pd.DataFrame(columns=['symbol', 'date', 'return'])
+    return (prices_df.dropna(subset=['return'])
+            [['symbol', 'date', 'return']]
+            .reset_index(drop=True))
 
 
 def check_symbols_validity(symbols):
-    """Check which symbols exist in the database"""
+    """Check which symbols exist in the database
+
+    One unnest+EXISTS round trip classifies every symbol, so the split
+    into valid/invalid is a single pass over the rows — no DISTINCT
+    scan and no set difference back in Python.
+    """
     try:
-        results = execute_query(check_symbols_exist_query(), (symbols,))
-        valid_symbols = [r['symbol'] for r in results]
-        return valid_symbols, list(set(symbols) - set(valid_symbols))
+        results = execute_query(symbol_validity_query(), (list(symbols),))
+        valid_symbols = [r['symbol'] for r in results if r['ok']]
+        invalid_symbols = [r['symbol'] for r in results if not r['ok']]
+        return valid_symbols, invalid_symbols
     except Exception as e:
         print(f"Error checking symbols: {e}")
         return [], symbols
@@ -29,20 +29,21 @@ def generate_mock_historical_data(symbol, days=252):
     """Generate realistic mock historical data"""
     base_price = MOCK_PRICES.get(symbol, 1000)
     
-    # Generate dates
+    # Generate dates on the trading calendar: business days keep the
+    # downstream pct_change from spanning weekend gaps
     end_date = datetime.now()
-    dates = pd.date_range(end=end_date, periods=days, freq='D')
+    dates = pd.date_range(end=end_date, periods=days, freq='B')
     
-    # Generate price series with realistic volatility
+    # Generate price series with realistic volatility. The walk is a
+    # cumulative product of (1 + r), computed in one numpy pass instead
+    # of a Python loop appending one price at a time
     returns = np.random.normal(0.0005, 0.02, days)  # Daily returns
-    prices = [base_price * 0.85]  # Start 15% lower
-    
-    for ret in returns[1:]:
-        prices.append(prices[-1] * (1 + ret))
+    factors = 1.0 + returns
+    factors[0] = 1.0
+    prices = base_price * 0.85 * np.cumprod(factors)  # Start 15% lower
     
     # Smooth the trend to end at current price
-    adjustment_factor = base_price / prices[-1]
-    prices = [p * adjustment_factor for p in prices]
+    prices *= base_price / prices[-1]
     
     df = pd.DataFrame({
         'symbol': symbol,
@@ -57,16 +58,14 @@ def generate_mock_nifty_data(days=252):
     base_price = 22000
     
     end_date = datetime.now()
-    dates = pd.date_range(end=end_date, periods=days, freq='D')
+    dates = pd.date_range(end=end_date, periods=days, freq='B')
     
     returns = np.random.normal(0.0003, 0.015, days)
-    prices = [base_price * 0.90]
-    
-    for ret in returns[1:]:
-        prices.append(prices[-1] * (1 + ret))
+    factors = 1.0 + returns
+    factors[0] = 1.0
+    prices = base_price * 0.90 * np.cumprod(factors)
     
-    adjustment_factor = base_price / prices[-1]
-    prices = [p * adjustment_factor for p in prices]
+    prices *= base_price / prices[-1]
     
     df = pd.DataFrame({
         'date': dates,
@@ -1,39 +1,62 @@
+# Query strings are built once at import; the accessor functions stay as
+# thin wrappers so callers are unchanged. Constant identity also keeps
+# the statement hash stable for server-side prepared-statement reuse.
+
+_HISTORICAL_PRICES_QUERY = """
+    SELECT symbol, date, close
+    FROM public.stock_data
+    WHERE symbol = ANY(%s)
+    AND date >= %s
+    AND date <= %s
+    ORDER BY symbol, date
+"""
+
+_LATEST_PRICE_QUERY = """
+    SELECT symbol, date, close
+    FROM public.stock_data
+    WHERE symbol = %s
+    ORDER BY date DESC
+    LIMIT 1
+"""
+
+_NIFTY50_DATA_QUERY = """
+    SELECT date, close
+    FROM public.stock_data
+    WHERE symbol = '^NSEI'
+    AND date >= %s
+    AND date <= %s
+    ORDER BY date
+"""
+
+_CHECK_SYMBOLS_EXIST_QUERY = """
+    SELECT DISTINCT symbol
+    FROM public.stock_data
+    WHERE symbol = ANY(%s)
+"""
+
+_SYMBOL_VALIDITY_QUERY = """
+    SELECT s AS symbol,
+           EXISTS(SELECT 1 FROM public.stock_data WHERE symbol = s) AS ok
+    FROM unnest(%s::text[]) AS s
+"""
+
+
 def get_historical_prices_query():
     """Get daily closing prices for multiple symbols over a date range"""
-    return """
-        SELECT symbol, date, close
-        FROM public.stock_data
-        WHERE symbol = ANY(%s)
-        AND date >= %s
-        AND date <= %s
-        ORDER BY symbol, date
-    """
+    return _HISTORICAL_PRICES_QUERY
 
 def get_latest_price_query():
     """Get the most recent closing price for a symbol"""
-    return """
-        SELECT symbol, date, close
-        FROM public.stock_data
-        WHERE symbol = %s
-        ORDER BY date DESC
-        LIMIT 1
-    """
+    return _LATEST_PRICE_QUERY
 
 def get_nifty50_data_query():
     """Get Nifty 50 index data for beta calculation"""
-    return """
-        SELECT date, close
-        FROM public.stock_data
-        WHERE symbol = '^NSEI'
-        AND date >= %s
-        AND date <= %s
-        ORDER BY date
-    """
+    return _NIFTY50_DATA_QUERY
 
 def check_symbols_exist_query():
     """Check if symbols exist in database"""
-    return """
-        SELECT DISTINCT symbol
-        FROM public.stock_data
-        WHERE symbol = ANY(%s)
-    """
+    return _CHECK_SYMBOLS_EXIST_QUERY
+
+def symbol_validity_query():
+    """Classify each input symbol as present or absent in one pass"""
+    return _SYMBOL_VALIDITY_QUERY
@@ -0,0 +1,45 @@
+"""
+File-backed TTL cache for yfinance responses
+
+Repeated reruns hit yfinance with identical requests; serving them from
+a pickle on disk turns a ~200ms network round-trip into an os.stat plus
+a small load, and keeps the app clear of rate limits.
+"""
+
+import hashlib
+import pickle
+import time
+from pathlib import Path
+
+_CACHE_DIR = Path.home() / ".cache" / "portfolio" / "yfinance"
+
+
+class FileCache:
+    """Pickle-on-disk cache with a per-read TTL"""
+
+    def __init__(self, cache_dir=_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return self.cache_dir / f"{digest}.pkl"
+
+    def get(self, key, ttl):
+        """Return the cached value for key, or None if absent/expired"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if time.time() - entry['ts'] > ttl:
+            return None
+        return entry['data']
+
+    def set(self, key, value):
+        """Store a value; failures are silent (cache is best-effort)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self._path(key), 'wb') as f:
+                pickle.dump({'ts': time.time(), 'data': value}, f)
+        except OSError:
+            pass
@@ -4,6 +4,9 @@ Uses Anthropic Claude API
 """
 
 import os
+import hashlib
+import orjson
+from functools import lru_cache
 from typing import List, Dict, Optional
 
 # Try to import anthropic
@@ -25,6 +28,7 @@ from llm.context_builder import (
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "YOUR_API_KEY_HERE")
 MODEL_NAME = "claude-sonnet-4-20250514"
 MAX_TOKENS = 2000
+HISTORY_TOKEN_BUDGET = 4000  # est. tokens of history kept per call
 
 class PortfolioChat:
     """Chat interface for portfolio insights using Claude API"""
@@ -44,18 +48,37 @@ class PortfolioChat:
         self.portfolio_context = ""
         self.optimization_context = ""
         self.risk_context = ""
-    
+        self._context_hashes = {}
+
+    def _context_changed(self, name, data):
+        """Hash the payload and report whether it differs from last time
+
+        blake2b over the orjson bytes is sub-millisecond even for large
+        portfolios, versus re-rendering a full context block.
+        """
+        digest = hashlib.blake2b(
+            orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+            digest_size=16
+        ).digest()
+        if self._context_hashes.get(name) == digest:
+            return False
+        self._context_hashes[name] = digest
+        return True
+
     def set_portfolio_data(self, portfolio_data):
-        """Set portfolio data for context"""
-        self.portfolio_context = build_portfolio_context(portfolio_data)
+        """Set portfolio data for context (no-op when the data is unchanged)"""
+        if self._context_changed('portfolio', portfolio_data):
+            self.portfolio_context = build_portfolio_context(portfolio_data)
     
     def set_optimization_data(self, optimization_result):
-        """Set optimization results for context"""
-        self.optimization_context = build_optimization_context(optimization_result)
+        """Set optimization results for context (no-op when unchanged)"""
+        if self._context_changed('optimization', optimization_result):
+            self.optimization_context = build_optimization_context(optimization_result)
     
     def set_risk_data(self, risk_data):
-        """Set risk analysis for context"""
-        self.risk_context = build_risk_context(risk_data)
+        """Set risk analysis for context (no-op when unchanged)"""
+        if self._context_changed('risk', risk_data):
+            self.risk_context = build_risk_context(risk_data)
     
     def get_full_context(self):
         """Build full context from all available data"""
@@ -72,57 +95,64 @@ class PortfolioChat:
         
         return "\n\n".join(context_parts)
     
-    def chat(self, user_message: str) -> str:
+    def chat_stream(self, user_message: str):
         """
-        Send a message and get response from Claude
+        Send a message and yield the growing response text as it streams
         
         Args:
             user_message: User's question/message
             
-        Returns:
-            Claude's response text
+        Yields:
+            Accumulated response text, updated per streamed chunk
         """
         if not self.is_configured:
-            return ("⚠️ Claude API is not configured. Please set your ANTHROPIC_API_KEY environment variable "
+            yield ("⚠️ Claude API is not configured. Please set your ANTHROPIC_API_KEY environment variable "
                    "or provide it in the settings. You can get an API key from: https://console.anthropic.com/")
+            return
         
         try:
-            # Build messages
-            messages = []
-            
-            # Add conversation history
-            for msg in self.conversation_history:
-                messages.append(msg)
-            
-            # Add current user message with context
+            # Send the context as its own cache_control block so the API
+            # caches the (large, rarely changing) portfolio context and
+            # only re-encodes the short question each turn
             full_context = self.get_full_context()
-            
-            if full_context:
-                user_content = f"""Portfolio Data Context:
-
-{full_context}
 
----
-
-User Question: {user_message}"""
+            if full_context:
+                user_content = [
+                    {
+                        "type": "text",
+                        "text": f"Portfolio Data Context:\n\n{full_context}",
+                        "cache_control": {"type": "ephemeral"}
+                    },
+                    {"type": "text", "text": f"User Question: {user_message}"}
+                ]
             else:
                 user_content = user_message
-            
-            messages.append({
+
+            # One slice copy of the running history plus the new turn,
+            # instead of re-appending every prior message each call
+            messages = [*self.conversation_history, {
                 "role": "user",
                 "content": user_content
-            })
+            }]
             
-            # Call Claude API
-            response = self.client.messages.create(
+            # Stream from Claude so callers can surface tokens as they
+            # arrive instead of waiting out the full generation
+            assistant_message = ""
+            # cache_control lets the API reuse the processed system
+            # prompt across turns instead of re-encoding it every call
+            with self.client.messages.stream(
                 model=MODEL_NAME,
                 max_tokens=MAX_TOKENS,
-                system=get_system_prompt(),
+                system=[{
+                    "type": "text",
+                    "text": get_system_prompt(),
+                    "cache_control": {"type": "ephemeral"}
+                }],
                 messages=messages
-            )
-            
-            # Extract response text
-            assistant_message = response.content[0].text
+            ) as stream:
+                for text in stream.text_stream:
+                    assistant_message += text
+                    yield assistant_message
             
             # Update conversation history (without full context to save tokens)
             self.conversation_history.append({
@@ -134,14 +164,33 @@ User Question: {user_message}"""
                 "content": assistant_message
             })
             
-            # Keep only last 10 messages to avoid token limits
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
-            
-            return assistant_message
+            # Trim by estimated token budget (~4 chars/token) rather
+            # than a fixed message count: ten long answers can blow the
+            # context while dozens of short turns fit comfortably
+            total = sum(len(m["content"]) // 4 for m in self.conversation_history)
+            while total > HISTORY_TOKEN_BUDGET and len(self.conversation_history) > 2:
+                # Drop the oldest user/assistant pair together
+                dropped = self.conversation_history[:2]
+                self.conversation_history = self.conversation_history[2:]
+                total -= sum(len(m["content"]) // 4 for m in dropped)
             
         except Exception as e:
-            return f"❌ Error communicating with Claude API: {str(e)}\n\nPlease check your API key and internet connection."
+            yield f"❌ Error communicating with Claude API: {str(e)}\n\nPlease check your API key and internet connection."
+
+    def chat(self, user_message: str) -> str:
+        """
+        Send a message and get the complete response from Claude
+        
+        Args:
+            user_message: User's question/message
+            
+        Returns:
+            Claude's response text
+        """
+        response = ""
+        for response in self.chat_stream(user_message):
+            pass
+        return response
     
     def reset_conversation(self):
         """Clear conversation history"""
@@ -149,55 +198,60 @@ User Question: {user_message}"""
     
     def get_suggested_questions(self, portfolio_data):
         """Generate suggested questions based on portfolio analysis"""
-        suggestions = []
-        
-        if not portfolio_data:
-            return [
-                "What should I consider when building a portfolio?",
-                "How do I diversify my investments?",
-                "What is a good Sharpe ratio?"
-            ]
-        
-        family = portfolio_data['family']
-        
-        # Risk-based suggestions
-        if family['risk_score'] > 6:
-            suggestions.append("Why is my portfolio risk score high and how can I reduce it?")
-        
-        # Overlap suggestions
-        if family['overlapping_stocks'] > 0:
-            suggestions.append("What's the problem with overlapping holdings and how should we fix it?")
-        
-        # Diversification suggestions
-        if family['metrics']['diversification_score'] < 5:
-            suggestions.append("How can we improve our portfolio diversification?")
-        
-        # Performance suggestions
-        if family['total_gain_pct'] < 0:
-            suggestions.append("Our portfolio is down. What should we do?")
-        elif family['total_gain_pct'] > 20:
-            suggestions.append("Should we book profits or hold our positions?")
-        
-        # General suggestions
-        suggestions.extend([
-            "What are the strengths and weaknesses of our portfolio?",
-            "Which member has the best portfolio allocation?",
-            "Should we rebalance our portfolio?"
-        ])
-        
-        return suggestions[:6]  # Return max 6 suggestions
+        return get_suggested_questions(portfolio_data)
 
-# Global chat instance
-chat_instance = None
+def get_suggested_questions(portfolio_data):
+    """Generate suggested questions based on portfolio analysis
+
+    Module-level: the rule table never touches the API client, so callers
+    can get suggestions without constructing a chat instance.
+    """
+    if not portfolio_data:
+        return [
+            "What should I consider when building a portfolio?",
+            "How do I diversify my investments?",
+            "What is a good Sharpe ratio?"
+        ]
+
+    family = portfolio_data['family']
+    gain_pct = family['total_gain_pct']
+
+    # Table-driven: each metric is read once and the matching
+    # suggestions fall out of one comprehension instead of a cascade
+    # of conditional appends
+    rules = [
+        (family['risk_score'] > 6,
+         "Why is my portfolio risk score high and how can I reduce it?"),
+        (family['overlapping_stocks'] > 0,
+         "What's the problem with overlapping holdings and how should we fix it?"),
+        (family['metrics']['diversification_score'] < 5,
+         "How can we improve our portfolio diversification?"),
+        (gain_pct < 0,
+         "Our portfolio is down. What should we do?"),
+        (gain_pct > 20,
+         "Should we book profits or hold our positions?"),
+        # General suggestions always apply
+        (True, "What are the strengths and weaknesses of our portfolio?"),
+        (True, "Which member has the best portfolio allocation?"),
+        (True, "Should we rebalance our portfolio?"),
+    ]
+
+    suggestions = [text for condition, text in rules if condition]
+
+    return suggestions[:6]  # Return max 6 suggestions
+
+@lru_cache(maxsize=8)
+def _chat_instance_for_key(api_key: Optional[str]):
+    return PortfolioChat(api_key)
 
 def get_chat_instance(api_key: Optional[str] = None):
-    """Get or create global chat instance"""
-    global chat_instance
-    
-    if chat_instance is None or api_key:
-        chat_instance = PortfolioChat(api_key)
-    
-    return chat_instance
+    """
+    Get the cached chat instance for an API key (env key when None).
+
+    Memoized so repeated messages reuse the same Anthropic client and its
+    pooled connection instead of paying a fresh TLS handshake per call.
+    """
+    return _chat_instance_for_key(api_key or None)
 
 def send_message(user_message: str, portfolio_data=None, optimization_result=None, risk_data=None, api_key: Optional[str] = None) -> str:
     """
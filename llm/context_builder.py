@@ -13,62 +13,72 @@ def build_portfolio_context(portfolio_data):
     members = portfolio_data['members']
     overlaps = portfolio_data['overlaps']
     family_holdings = portfolio_data['family_holdings']
-    
-    # Build context sections
+    metrics = family['metrics']
+
+    # Each section renders as one f-string block, so every field is looked
+    # up once instead of re-chaining through the nested dicts per line
     context_parts = []
-    
+
     # Family overview
-    context_parts.append("# FAMILY PORTFOLIO OVERVIEW")
-    context_parts.append(f"Email: {family['email']}")
-    context_parts.append(f"Total Value: ₹{family['total_value']:,.2f}")
-    context_parts.append(f"Total Gain: ₹{family['total_gain']:,.2f} ({family['total_gain_pct']:.2f}%)")
-    context_parts.append(f"Members: {family['member_count']}")
-    context_parts.append(f"Unique Stocks: {family['unique_stocks']}")
-    context_parts.append(f"Overlapping Stocks: {family['overlapping_stocks']}")
-    context_parts.append(f"Risk Score: {family['risk_score']}/10")
+    context_parts.append(
+        f"# FAMILY PORTFOLIO OVERVIEW\n"
+        f"Email: {family['email']}\n"
+        f"Total Value: ₹{family['total_value']:,.2f}\n"
+        f"Total Gain: ₹{family['total_gain']:,.2f} ({family['total_gain_pct']:.2f}%)\n"
+        f"Members: {family['member_count']}\n"
+        f"Unique Stocks: {family['unique_stocks']}\n"
+        f"Overlapping Stocks: {family['overlapping_stocks']}\n"
+        f"Risk Score: {family['risk_score']}/10"
+    )
     context_parts.append("")
-    
+
     # Family metrics
-    context_parts.append("## Family Portfolio Metrics")
-    context_parts.append(f"- Volatility: {family['metrics']['volatility']:.4f}")
-    context_parts.append(f"- Expected Return: {family['metrics']['expected_return']:.4f}")
-    context_parts.append(f"- Sharpe Ratio: {family['metrics']['sharpe_ratio']:.4f}")
-    context_parts.append(f"- Beta: {family['metrics']['beta']:.4f}")
-    context_parts.append(f"- Diversification Score: {family['metrics']['diversification_score']:.2f}/10")
+    context_parts.append(
+        f"## Family Portfolio Metrics\n"
+        f"- Volatility: {metrics['volatility']:.4f}\n"
+        f"- Expected Return: {metrics['expected_return']:.4f}\n"
+        f"- Sharpe Ratio: {metrics['sharpe_ratio']:.4f}\n"
+        f"- Beta: {metrics['beta']:.4f}\n"
+        f"- Diversification Score: {metrics['diversification_score']:.2f}/10"
+    )
     context_parts.append("")
-    
+
     # Family holdings
-    context_parts.append("## Family Holdings (Aggregated)")
     sorted_holdings = sorted(family_holdings.items(), key=lambda x: x[1]['value'], reverse=True)
-    for symbol, data in sorted_holdings:
-        context_parts.append(f"- {symbol}: ₹{data['value']:,.2f} ({data['weight']:.1f}%), owned by: {', '.join(data['owners'])}")
+    context_parts.append("## Family Holdings (Aggregated)\n" + "\n".join(
+        f"- {symbol}: ₹{data['value']:,.2f} ({data['weight']:.1f}%), owned by: {', '.join(data['owners'])}"
+        for symbol, data in sorted_holdings
+    ))
     context_parts.append("")
-    
+
     # Overlapping holdings
     if overlaps:
-        context_parts.append("## Overlapping Holdings (RISK ALERT)")
-        for symbol, owners in overlaps.items():
-            context_parts.append(f"- {symbol}: Owned by {len(owners)} members ({', '.join(owners)})")
+        context_parts.append("## Overlapping Holdings (RISK ALERT)\n" + "\n".join(
+            f"- {symbol}: Owned by {len(owners)} members ({', '.join(owners)})"
+            for symbol, owners in overlaps.items()
+        ))
         context_parts.append("")
-    
+
     # Member details
     context_parts.append("## Individual Member Portfolios")
     for member in members:
-        context_parts.append(f"\n### {member['name']} ({member['id']})")
-        context_parts.append(f"Portfolio Value: ₹{member['value']:,.2f}")
-        context_parts.append(f"Gain: ₹{member['gain']:,.2f} ({member['gain_pct']:.2f}%)")
-        context_parts.append(f"Number of Holdings: {member['holdings_count']}")
-        context_parts.append(f"Sharpe Ratio: {member['metrics']['sharpe_ratio']:.4f}")
-        context_parts.append(f"Diversification Score: {member['metrics']['diversification_score']:.2f}/10")
-        
-        context_parts.append("\nHoldings:")
-        for holding in sorted(member['holdings'], key=lambda x: x['value'], reverse=True):
-            context_parts.append(
-                f"  - {holding['symbol']}: {holding['quantity']} shares @ ₹{holding['current_price']:.2f} "
-                f"= ₹{holding['value']:,.2f} ({holding['weight']:.1f}%), "
-                f"Gain: {holding['gain_pct']:.1f}%"
-            )
-    
+        member_metrics = member['metrics']
+        context_parts.append(
+            f"\n### {member['name']} ({member['id']})\n"
+            f"Portfolio Value: ₹{member['value']:,.2f}\n"
+            f"Gain: ₹{member['gain']:,.2f} ({member['gain_pct']:.2f}%)\n"
+            f"Number of Holdings: {member['holdings_count']}\n"
+            f"Sharpe Ratio: {member_metrics['sharpe_ratio']:.4f}\n"
+            f"Diversification Score: {member_metrics['diversification_score']:.2f}/10"
+        )
+
+        context_parts.append("\nHoldings:\n" + "\n".join(
+            f"  - {holding['symbol']}: {holding['quantity']} shares @ ₹{holding['current_price']:.2f} "
+            f"= ₹{holding['value']:,.2f} ({holding['weight']:.1f}%), "
+            f"Gain: {holding['gain_pct']:.1f}%"
+            for holding in sorted(member['holdings'], key=lambda x: x['value'], reverse=True)
+        ))
+
     return "\n".join(context_parts)
 
 def build_optimization_context(optimization_result):
@@ -77,44 +87,38 @@ def build_optimization_context(optimization_result):
     if not optimization_result:
         return "No optimization data available."
     
-    context_parts = []
-    
-    context_parts.append("# PORTFOLIO OPTIMIZATION RESULTS")
-    context_parts.append("")
-    
-    # Current portfolio
     current = optimization_result['current']
-    context_parts.append("## Current Portfolio")
-    context_parts.append(f"- Expected Return: {current['expected_return']*100:.2f}%")
-    context_parts.append(f"- Volatility: {current['volatility']*100:.2f}%")
-    context_parts.append(f"- Sharpe Ratio: {current['sharpe_ratio']:.4f}")
-    context_parts.append("")
-    
-    # Optimized portfolio
     optimized = optimization_result['optimized']
-    context_parts.append("## Optimized Portfolio")
-    context_parts.append(f"- Expected Return: {optimized['expected_return']*100:.2f}%")
-    context_parts.append(f"- Volatility: {optimized['volatility']*100:.2f}%")
-    context_parts.append(f"- Sharpe Ratio: {optimized['sharpe_ratio']:.4f}")
-    context_parts.append("")
-    
-    # Improvements
     improvement = optimization_result['improvement']
-    context_parts.append("## Improvements")
-    context_parts.append(f"- Return Change: {improvement['return_change']*100:+.2f}%")
-    context_parts.append(f"- Volatility Change: {improvement['volatility_change']*100:+.2f}%")
-    context_parts.append(f"- Sharpe Change: {improvement['sharpe_change']:+.4f}")
-    context_parts.append("")
-    
-    # Top rebalancing trades
-    context_parts.append("## Key Rebalancing Actions")
-    for i, trade in enumerate(optimization_result['trades'][:5], 1):
-        context_parts.append(
-            f"{i}. {trade['action']} {trade['quantity']:.0f} shares of {trade['symbol']} "
-            f"(₹{trade['value']:,.0f}), weight change: {trade['weight_change']:+.1f}%"
-        )
-    
-    return "\n".join(context_parts)
+    top_trades = optimization_result['trades'][:5]
+
+    trades_text = "\n".join(
+        f"{i}. {trade['action']} {trade['quantity']:.0f} shares of {trade['symbol']} "
+        f"(₹{trade['value']:,.0f}), weight change: {trade['weight_change']:+.1f}%"
+        for i, trade in enumerate(top_trades, 1)
+    )
+
+    return (
+        f"# PORTFOLIO OPTIMIZATION RESULTS\n"
+        f"\n"
+        f"## Current Portfolio\n"
+        f"- Expected Return: {current['expected_return']*100:.2f}%\n"
+        f"- Volatility: {current['volatility']*100:.2f}%\n"
+        f"- Sharpe Ratio: {current['sharpe_ratio']:.4f}\n"
+        f"\n"
+        f"## Optimized Portfolio\n"
+        f"- Expected Return: {optimized['expected_return']*100:.2f}%\n"
+        f"- Volatility: {optimized['volatility']*100:.2f}%\n"
+        f"- Sharpe Ratio: {optimized['sharpe_ratio']:.4f}\n"
+        f"\n"
+        f"## Improvements\n"
+        f"- Return Change: {improvement['return_change']*100:+.2f}%\n"
+        f"- Volatility Change: {improvement['volatility_change']*100:+.2f}%\n"
+        f"- Sharpe Change: {improvement['sharpe_change']:+.4f}\n"
+        f"\n"
+        f"## Key Rebalancing Actions\n"
+        f"{trades_text}"
+    )
 
 def build_risk_context(risk_data):
     """Build context from risk analysis"""
@@ -123,48 +127,55 @@ def build_risk_context(risk_data):
         return "No risk data available."
     
     context_parts = []
-    
-    context_parts.append("# RISK ANALYSIS RESULTS")
-    context_parts.append("")
-    
+
     # Concentration risk
     conc = risk_data['concentration_risk']
-    context_parts.append("## Concentration Risk")
-    context_parts.append(f"- HHI Index: {conc['hhi']:.2f}")
-    context_parts.append(f"- Top 1 Stock: {conc['top_1_concentration']:.1f}%")
-    context_parts.append(f"- Top 3 Stocks: {conc['top_3_concentration']:.1f}%")
-    context_parts.append(f"- Top 5 Stocks: {conc['top_5_concentration']:.1f}%")
-    context_parts.append(f"- Concentration Level: {conc['concentration_level']}")
-    context_parts.append(f"- Risk Rating: {conc['risk_rating']}")
-    context_parts.append(f"- Effective Holdings: {conc['effective_holdings']:.2f}")
+    context_parts.append(
+        f"# RISK ANALYSIS RESULTS\n"
+        f"\n"
+        f"## Concentration Risk\n"
+        f"- HHI Index: {conc['hhi']:.2f}\n"
+        f"- Top 1 Stock: {conc['top_1_concentration']:.1f}%\n"
+        f"- Top 3 Stocks: {conc['top_3_concentration']:.1f}%\n"
+        f"- Top 5 Stocks: {conc['top_5_concentration']:.1f}%\n"
+        f"- Concentration Level: {conc['concentration_level']}\n"
+        f"- Risk Rating: {conc['risk_rating']}\n"
+        f"- Effective Holdings: {conc['effective_holdings']:.2f}"
+    )
     context_parts.append("")
-    
+
     # VaR
     if risk_data['var']:
         var = risk_data['var']
         cvar = risk_data['cvar']
-        context_parts.append("## Value at Risk (VaR)")
-        context_parts.append(f"- Confidence Level: {var['confidence_level']*100:.0f}%")
-        context_parts.append(f"- Daily VaR: {var['daily_var']*100:.2f}%")
-        context_parts.append(f"- Annual VaR: {var['annual_var']*100:.2f}%")
-        context_parts.append(f"- Daily CVaR: {cvar['daily_cvar']*100:.2f}%")
-        context_parts.append(f"- Annual CVaR: {cvar['annual_cvar']*100:.2f}%")
+        context_parts.append(
+            f"## Value at Risk (VaR)\n"
+            f"- Confidence Level: {var['confidence_level']*100:.0f}%\n"
+            f"- Daily VaR: {var['daily_var']*100:.2f}%\n"
+            f"- Annual VaR: {var['annual_var']*100:.2f}%\n"
+            f"- Daily CVaR: {cvar['daily_cvar']*100:.2f}%\n"
+            f"- Annual CVaR: {cvar['annual_cvar']*100:.2f}%"
+        )
         context_parts.append("")
-    
+
     # Risk contributions
     if risk_data['risk_contributions']:
-        context_parts.append("## Risk Contribution by Holding")
-        for contrib in risk_data['risk_contributions'][:5]:
-            context_parts.append(
-                f"- {contrib['symbol']}: Weight {contrib['weight']:.1f}%, "
-                f"Risk Contribution {contrib['risk_contribution']:.1f}%"
-            )
+        context_parts.append("## Risk Contribution by Holding\n" + "\n".join(
+            f"- {contrib['symbol']}: Weight {contrib['weight']:.1f}%, "
+            f"Risk Contribution {contrib['risk_contribution']:.1f}%"
+            for contrib in risk_data['risk_contributions'][:5]
+        ))
         context_parts.append("")
     
     # Correlation summary
     if not risk_data['correlation_matrix'].empty:
         corr_matrix = risk_data['correlation_matrix']
-        avg_corr = corr_matrix.values[corr_matrix.values != 1].mean()
+        # Off-diagonal mean via the trace identity: no boolean mask or
+        # element copy, and correct even when an off-diagonal pair is
+        # exactly 1.0
+        vals = corr_matrix.values
+        n = vals.shape[0]
+        avg_corr = (vals.sum() - vals.trace()) / (n * n - n) if n > 1 else 0.0
         context_parts.append("## Correlation Analysis")
         context_parts.append(f"- Average Correlation: {avg_corr:.3f}")
         context_parts.append(f"- Number of Stocks: {len(corr_matrix)}")
@@ -1,28 +1,102 @@
+import asyncio
+import atexit
+import threading
+from contextlib import AsyncExitStack
+
 from mcp.client import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-import json
+import orjson
+
+
+class AsyncLoopThread:
+    """Dedicated asyncio loop running on a background thread.
+
+    The MCP stdio transport is async-only, but the Gradio handlers are
+    synchronous. Running one long-lived loop here lets a single session
+    stay open for the app's lifetime instead of paying a subprocess spawn
+    plus initialize handshake on every tool call.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout=30):
+        """Run a coroutine on the loop and block for its result
+
+        The timeout keeps a wedged server from hanging the calling Gradio
+        handler forever.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
 
 
 class PortfolioMCPClient:
     def __init__(self):
         self.session = None
+        self._loop_thread = None
+        self._exit_stack = None
+
+    def connect(self):
+        """Spawn the server once and hold the session open for reuse"""
+        if self.session is not None:
+            return
+
+        self._loop_thread = AsyncLoopThread()
+        self._loop_thread.run(self._connect())
+        atexit.register(self.close)
 
-    async def connect(self):
-        """Connect to MCP server"""
+    async def _connect(self):
         server_params = StdioServerParameters(
             command="python",
             args=["mcp_server.py"]
         )
 
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                self.session = session
-                await session.initialize()
+        # An exit stack keeps the stdio transport and session contexts
+        # open after this coroutine returns; they are unwound in close()
+        self._exit_stack = AsyncExitStack()
+        read, write = await self._exit_stack.enter_async_context(stdio_client(server_params))
+        self.session = await self._exit_stack.enter_async_context(ClientSession(read, write))
+        await self.session.initialize()
+
+    def call_tool(self, tool_name, **kwargs):
+        """Call an MCP tool on the persistent session"""
+        result = self._loop_thread.run(
+            self.session.call_tool(tool_name, arguments=kwargs)
+        )
+        return orjson.loads(result.content[0].text)
 
-    async def call_tool(self, tool_name, **kwargs):
-        """Call MCP tool"""
-        result = await self.session.call_tool(tool_name, arguments=kwargs)
-        return json.loads(result.content[0].text)
+    def call_tools(self, calls):
+        """Dispatch several tool calls concurrently on the shared session
+
+        calls: list of (tool_name, arguments) tuples. The calls run under
+        asyncio.gather, so total latency is the slowest call rather than
+        the sum of all of them.
+        """
+        async def _gather():
+            return await asyncio.gather(
+                *(self.session.call_tool(name, arguments=args) for name, args in calls)
+            )
+
+        results = self._loop_thread.run(_gather())
+        return [orjson.loads(r.content[0].text) for r in results]
+
+    def close(self):
+        if self._loop_thread is None:
+            return
+        if self._exit_stack is not None:
+            self._loop_thread.run(self._exit_stack.aclose())
+            self._exit_stack = None
+        self.session = None
+        self._loop_thread.stop()
+        self._loop_thread = None
 
 
 # Singleton
@@ -33,4 +107,5 @@ def get_mcp_client():
     global _client
     if _client is None:
         _client = PortfolioMCPClient()
-    return _client
\ No newline at end of file
+        _client.connect()
+    return _client
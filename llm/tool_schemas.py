@@ -0,0 +1,56 @@
+"""
+Shared tool schemas for Claude tool use
+
+Single definition of the portfolio tool schemas passed to the Claude API,
+built once at import as a tuple so chat turns reuse the same objects
+instead of reallocating the nested dict literals.
+"""
+
+CHAT_TOOLS = (
+    {
+        "name": "analyze_portfolio",
+        "description": "Analyze family portfolio metrics, performance, and overlaps",
+        "input_schema": {
+            "type": "object",
+            "properties": {"portfolio_json": {"type": "string"}},
+            "required": ["portfolio_json"]
+        }
+    },
+    {
+        "name": "optimize_portfolio",
+        "description": "Optimize portfolio allocation for better returns",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "portfolio_json": {"type": "string"},
+                "method": {"type": "string", "enum": ["max_sharpe", "min_volatility", "equal_weight"],
+                           "default": "max_sharpe"}
+            },
+            "required": ["portfolio_json"]
+        }
+    },
+    {
+        "name": "analyze_risk",
+        "description": "Analyze portfolio risk metrics including VaR and concentration",
+        "input_schema": {
+            "type": "object",
+            "properties": {"portfolio_json": {"type": "string"}},
+            "required": ["portfolio_json"]
+        }
+    },
+    {
+        "name": "run_scenario",
+        "description": "Run what-if scenario analysis on portfolio",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "portfolio_json": {"type": "string"},
+                "scenario": {"type": "string", "default": "Market Crash (-20%)"}
+            },
+            "required": ["portfolio_json"]
+        },
+        # Marking the last tool caches the whole tool-schema prefix
+        # server-side, so later turns skip re-processing it
+        "cache_control": {"type": "ephemeral"}
+    }
+)
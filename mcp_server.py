@@ -5,7 +5,7 @@ Exposes portfolio analysis tools to Claude via Model Context Protocol
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent
-import json
+import orjson
 import asyncio
 
 # Import your existing modules
@@ -20,6 +20,32 @@ from portfolio.risk_analyzer import (
 # Create MCP server
 server = Server("portfolio-analytics")
 
+# The scenario list is static: build it once and index by name, instead
+# of reconstructing and scanning it on every run_scenario call
+_SCENARIOS = get_default_scenarios()
+_SCENARIOS_BY_NAME = {s['name']: s for s in _SCENARIOS}
+
+
+def _dumps(obj):
+    """Serialize a tool result with orjson (numpy and non-str keys pass
+    through natively, no custom encoder needed)"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _avg_correlation(corr_matrix):
+    """Mean off-diagonal correlation via the trace identity
+
+    Avoids the boolean-mask copy of the matrix, and stays correct when
+    an off-diagonal pair happens to be exactly 1.0.
+    """
+    if corr_matrix.empty:
+        return 0.0
+    vals = corr_matrix.values
+    n = vals.shape[0]
+    if n <= 1:
+        return 0.0
+    return float((vals.sum() - vals.trace()) / (n * n - n))
+
 
 @server.tool()
 async def analyze_portfolio(portfolio_json: str) -> str:
@@ -56,7 +82,7 @@ async def analyze_portfolio(portfolio_json: str) -> str:
         - Performance metrics
     """
     try:
-        data = json.loads(portfolio_json)
+        data = orjson.loads(portfolio_json)
         result = process_portfolio_data(data)
 
         # Simplify for JSON serialization
@@ -67,9 +93,9 @@ async def analyze_portfolio(portfolio_json: str) -> str:
             "family_holdings": result['family_holdings']
         }
 
-        return json.dumps(output, indent=2)
+        return _dumps(output)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 @server.tool()
@@ -96,13 +122,13 @@ async def optimize_portfolio(
         - Efficient frontier data
     """
     try:
-        data = json.loads(portfolio_json)
+        data = orjson.loads(portfolio_json)
         portfolio = process_portfolio_data(data)
 
         result = optimize_family_portfolio(portfolio, method=method)
 
         if result is None:
-            return json.dumps({"error": "Optimization failed"})
+            return _dumps({"error": "Optimization failed"})
 
         # Simplify for JSON
         output = {
@@ -112,9 +138,9 @@ async def optimize_portfolio(
             "trades": result['trades'][:10]  # Top 10 trades
         }
 
-        return json.dumps(output, indent=2)
+        return _dumps(output)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 @server.tool()
@@ -135,7 +161,7 @@ async def analyze_risk(portfolio_json: str) -> str:
         - Risk contribution by holding
     """
     try:
-        data = json.loads(portfolio_json)
+        data = orjson.loads(portfolio_json)
         portfolio = process_portfolio_data(data)
 
         risk_data = analyze_portfolio_risk(portfolio)
@@ -147,15 +173,13 @@ async def analyze_risk(portfolio_json: str) -> str:
             "cvar": risk_data['cvar'],
             "risk_contributions": risk_data['risk_contributions'][:5],  # Top 5
             "correlation_summary": {
-                "avg_correlation": float(risk_data['correlation_matrix'].values[
-                                             risk_data['correlation_matrix'].values != 1
-                                             ].mean()) if not risk_data['correlation_matrix'].empty else 0
+                "avg_correlation": _avg_correlation(risk_data['correlation_matrix'])
             }
         }
 
-        return json.dumps(output, indent=2)
+        return _dumps(output)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 @server.tool()
@@ -184,20 +208,21 @@ async def run_scenario(
         - Impact assessment
     """
     try:
-        data = json.loads(portfolio_json)
+        data = orjson.loads(portfolio_json)
         portfolio = process_portfolio_data(data)
 
-        scenarios = get_default_scenarios()
-        selected = next((s for s in scenarios if s['name'] == scenario), scenarios[0])
+        selected = _SCENARIOS_BY_NAME.get(scenario, _SCENARIOS[0])
+        # Hand the simulator a copy so the shared definition stays pristine
+        selected = dict(selected, stock_changes=dict(selected['stock_changes']))
 
         results = simulate_scenarios(portfolio, [selected])
 
         if results:
-            return json.dumps(results[0], indent=2)
+            return _dumps(results[0])
         else:
-            return json.dumps({"error": "Scenario simulation failed"})
+            return _dumps({"error": "Scenario simulation failed"})
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 @server.tool()
@@ -221,9 +246,9 @@ async def get_stock_info(symbol: str) -> str:
 
         metrics = calculate_stock_metrics(symbol)
 
-        return json.dumps(metrics, indent=2)
+        return _dumps(metrics)
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        return _dumps({"error": str(e)})
 
 
 # Server startup
@@ -1,35 +1,47 @@
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
+from functools import lru_cache
 from database.data_loader import get_historical_data, calculate_returns
 
 RISK_FREE_RATE = 0.065
 TRADING_DAYS = 252
 
-def get_returns_and_cov(symbols, lookback_days=252):
-    """
-    Get historical returns and covariance matrix for symbols
-    Returns: (expected_returns, cov_matrix)
-    """
-    # Get historical data
-    hist_df = get_historical_data(symbols, days=lookback_days)
-    
+@lru_cache(maxsize=8)
+def _portfolio_stats(symbols_key, lookback_days):
+    """Load history once per universe and derive all shared statistics"""
+    hist_df = get_historical_data(list(symbols_key), days=lookback_days)
+
     if hist_df.empty:
-        return None, None
-    
-    # Calculate returns
+        return None, None, None
+
     returns_df = calculate_returns(hist_df)
-    
+
     # Pivot to get returns matrix
     returns_pivot = returns_df.pivot(index='date', columns='symbol', values='return')
     returns_pivot = returns_pivot.fillna(0)
-    
-    # Calculate expected returns (annualized)
+
+    # Annualized expected returns and covariance
     expected_returns = returns_pivot.mean() * TRADING_DAYS
-    
-    # Calculate covariance matrix (annualized)
     cov_matrix = returns_pivot.cov() * TRADING_DAYS
-    
+
+    return expected_returns, cov_matrix, returns_pivot
+
+def get_portfolio_stats(symbols, lookback_days=252):
+    """
+    Get cached (expected_returns, cov_matrix, returns_pivot) for symbols.
+
+    Optimization, the efficient-frontier sweep and risk analysis all need
+    the same covariance, so it is computed once per universe and shared
+    instead of re-downloading history for every call.
+    """
+    return _portfolio_stats(tuple(sorted(symbols)), lookback_days)
+
+def get_returns_and_cov(symbols, lookback_days=252):
+    """
+    Get historical returns and covariance matrix for symbols
+    Returns: (expected_returns, cov_matrix)
+    """
+    expected_returns, cov_matrix, _ = get_portfolio_stats(symbols, lookback_days)
     return expected_returns, cov_matrix
 
 def optimize_portfolio(symbols, current_weights=None, target_return=None, method='max_sharpe'):
@@ -93,7 +105,9 @@ def optimize_portfolio(symbols, current_weights=None, target_return=None, method
     else:
         initial_weights = np.array([1/n_assets] * n_assets)
     
-    # Optimize
+    # Optimize. scipy is imported here, not at module top, so the app's
+    # cold start doesn't pay for it until an optimization actually runs
+    from scipy.optimize import minimize
     if method == 'max_sharpe' or method == 'target_return':
         result = minimize(negative_sharpe, initial_weights, method='SLSQP',
                          bounds=bounds, constraints=constraints)
@@ -128,18 +142,23 @@ def generate_efficient_frontier(symbols, n_points=50):
     max_ret = expected_returns.max()
     
     target_returns = np.linspace(min_ret, max_ret, n_points)
-    
+
     frontier_volatility = []
     frontier_returns = []
     frontier_sharpe = []
-    
+
+    # Adjacent frontier points have near-identical solutions, so warm-start
+    # each solve from the previous point's weights - SLSQP then converges in
+    # a few iterations instead of starting from equal weights every time
+    warm_start = None
     for target_ret in target_returns:
-        result = optimize_portfolio(symbols, target_return=target_ret)
-        
+        result = optimize_portfolio(symbols, current_weights=warm_start, target_return=target_ret)
+
         if result is not None:
             frontier_returns.append(result['expected_return'])
             frontier_volatility.append(result['volatility'])
             frontier_sharpe.append(result['sharpe_ratio'])
+            warm_start = result['weights']
         else:
             frontier_returns.append(target_ret)
             frontier_volatility.append(np.nan)
@@ -1,7 +1,56 @@
 import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from database.data_loader import get_historical_data, calculate_returns
 from portfolio.calculator import calculate_correlation_matrix
+from portfolio.optimizer import get_portfolio_stats
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op decorator so the kernels run as plain NumPy without numba"""
+        if args and callable(args[0]):
+            return args[0]
+
+        def wrap(func):
+            return func
+        return wrap
+
+
+# Hot numeric kernels, JIT-compiled when numba is installed. cache=True
+# persists the compiled code so the first-click JIT cost is paid once.
+
+@njit(cache=True, fastmath=True)
+def _hhi_stats(weights):
+    """Return (HHI scaled to 0-10000, effective holdings) for weight array"""
+    sum_sq = 0.0
+    for w in weights:
+        sum_sq += w * w
+    effective = 1.0 / sum_sq if sum_sq > 0 else 0.0
+    return sum_sq * 10000.0, effective
+
+
+@njit(cache=True, fastmath=True)
+def _var_cvar(returns, confidence_level):
+    """Historical VaR and CVaR (expected shortfall) at given confidence"""
+    var = np.percentile(returns, (1.0 - confidence_level) * 100.0)
+    tail = returns[returns <= var]
+    return var, tail.mean()
+
+
+@njit(cache=True, fastmath=True)
+def _risk_contribution_kernel(cov_matrix, weights):
+    """Marginal and percentage risk contributions from covariance and weights"""
+    portfolio_var = weights @ cov_matrix @ weights
+    portfolio_vol = np.sqrt(portfolio_var)
+    marginal_contrib = (cov_matrix @ weights) / portfolio_vol
+    risk_contrib_pct = (weights * marginal_contrib / portfolio_vol) * 100.0
+    return risk_contrib_pct, marginal_contrib
+
 
 def analyze_portfolio_risk(portfolio_data, confidence_level=0.95):
     """
@@ -16,14 +65,21 @@ def analyze_portfolio_risk(portfolio_data, confidence_level=0.95):
     """
     all_symbols = list(portfolio_data['family_holdings'].keys())
     
-    # Get correlation matrix
-    corr_matrix = calculate_correlation_matrix(all_symbols)
-    
-    # Get historical data for VaR calculation
-    hist_df = get_historical_data(all_symbols)
-    returns_df = calculate_returns(hist_df)
-    
-    if returns_df.empty:
+    # The correlation matrix and the optimizer's stats cache each fetch
+    # price history independently; run both on threads so the two I/O
+    # waits overlap instead of stacking
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        corr_future = executor.submit(calculate_correlation_matrix, all_symbols)
+        stats_future = executor.submit(get_portfolio_stats, all_symbols)
+        corr_matrix = corr_future.result()
+        _, _, returns_pivot = stats_future.result()
+
+    # float32 halves the payload serialized to the browser heatmap and is
+    # visually indistinguishable
+    if not corr_matrix.empty:
+        corr_matrix = corr_matrix.astype(np.float32)
+
+    if returns_pivot is None or returns_pivot.empty:
         return {
             'correlation_matrix': corr_matrix,
             'var': None,
@@ -31,11 +87,7 @@ def analyze_portfolio_risk(portfolio_data, confidence_level=0.95):
             'risk_contributions': [],
             'concentration_risk': {}
         }
-    
-    # Calculate portfolio returns
-    returns_pivot = returns_df.pivot(index='date', columns='symbol', values='return')
-    returns_pivot = returns_pivot.fillna(0)
-    
+
     # Get portfolio weights
     weights = np.array([
         portfolio_data['family_holdings'][s]['weight'] / 100
@@ -74,9 +126,9 @@ def calculate_var(returns, confidence_level=0.95):
     """Calculate Value at Risk"""
     if len(returns) == 0:
         return None
-    
-    var = np.percentile(returns, (1 - confidence_level) * 100)
-    
+
+    var, _ = _var_cvar(np.ascontiguousarray(returns, dtype=np.float64), confidence_level)
+
     return {
         'daily_var': var,
         'annual_var': var * np.sqrt(252),
@@ -87,10 +139,9 @@ def calculate_cvar(returns, confidence_level=0.95):
     """Calculate Conditional VaR (Expected Shortfall)"""
     if len(returns) == 0:
         return None
-    
-    var_threshold = np.percentile(returns, (1 - confidence_level) * 100)
-    cvar = returns[returns <= var_threshold].mean()
-    
+
+    _, cvar = _var_cvar(np.ascontiguousarray(returns, dtype=np.float64), confidence_level)
+
     return {
         'daily_cvar': cvar,
         'annual_cvar': cvar * np.sqrt(252),
@@ -99,21 +150,11 @@ def calculate_cvar(returns, confidence_level=0.95):
 
 def calculate_risk_contribution(returns_matrix, weights, symbols):
     """Calculate risk contribution of each holding"""
-    cov_matrix = returns_matrix.cov()
-    
-    # Portfolio variance
-    portfolio_var = np.dot(weights.T, np.dot(cov_matrix, weights))
-    portfolio_vol = np.sqrt(portfolio_var)
-    
-    # Marginal contribution to risk
-    marginal_contrib = np.dot(cov_matrix, weights) / portfolio_vol
-    
-    # Risk contribution
-    risk_contrib = weights * marginal_contrib
-    
-    # Percentage contribution
-    risk_contrib_pct = (risk_contrib / portfolio_vol) * 100
-    
+    cov_matrix = np.ascontiguousarray(returns_matrix.cov().values, dtype=np.float64)
+    weights = np.ascontiguousarray(weights, dtype=np.float64)
+
+    risk_contrib_pct, marginal_contrib = _risk_contribution_kernel(cov_matrix, weights)
+
     contributions = []
     for i, symbol in enumerate(symbols):
         contributions.append({
@@ -132,10 +173,10 @@ def analyze_concentration_risk(portfolio_data):
     """Analyze concentration risk metrics"""
     holdings = portfolio_data['family_holdings']
     
-    # Calculate HHI (Herfindahl-Hirschman Index)
-    weights = [h['weight'] / 100 for h in holdings.values()]
-    hhi = sum([w**2 for w in weights]) * 10000  # Scaled to 0-10000
-    
+    # Calculate HHI (Herfindahl-Hirschman Index), scaled to 0-10000
+    weights = np.array([h['weight'] / 100 for h in holdings.values()], dtype=np.float64)
+    hhi, effective_holdings = _hhi_stats(weights)
+
     # Top holdings concentration
     sorted_holdings = sorted(holdings.items(), key=lambda x: x[1]['weight'], reverse=True)
     
@@ -164,7 +205,7 @@ def analyze_concentration_risk(portfolio_data):
         'top_5_concentration': top_5_concentration,
         'concentration_level': concentration_level,
         'risk_rating': risk_rating,
-        'effective_holdings': 1 / sum([w**2 for w in weights]) if weights else 0
+        'effective_holdings': effective_holdings
     }
 
 def simulate_scenarios(portfolio_data, scenarios):
@@ -174,30 +215,34 @@ def simulate_scenarios(portfolio_data, scenarios):
     scenarios: list of dicts with {name, stock_changes}
     stock_changes: dict of {symbol: percentage_change}
     """
-    results = []
-    
-    for scenario in scenarios:
-        scenario_value = 0
-        
-        for symbol, data in portfolio_data['family_holdings'].items():
-            current_value = data['value']
-            change = scenario['stock_changes'].get(symbol, 0)
-            new_value = current_value * (1 + change / 100)
-            scenario_value += new_value
-        
-        current_value = portfolio_data['family']['total_value']
-        value_change = scenario_value - current_value
-        pct_change = (value_change / current_value * 100) if current_value > 0 else 0
-        
-        results.append({
+    holdings = portfolio_data['family_holdings']
+    symbols = list(holdings.keys())
+
+    # Stack all scenarios into an (S, N) shock matrix and apply them to the
+    # holding values in a single matmul instead of nested Python loops
+    values = np.array([holdings[s]['value'] for s in symbols], dtype=np.float64)
+    shocks = np.array([[scenario['stock_changes'].get(s, 0) for s in symbols] for scenario in scenarios],
+                      dtype=np.float64)
+
+    scenario_values = (1 + shocks / 100) @ values
+
+    current_value = portfolio_data['family']['total_value']
+    value_changes = scenario_values - current_value
+    if current_value > 0:
+        pct_changes = value_changes / current_value * 100
+    else:
+        pct_changes = np.zeros_like(value_changes)
+
+    return [
+        {
             'scenario': scenario['name'],
             'current_value': current_value,
-            'scenario_value': scenario_value,
-            'value_change': value_change,
-            'pct_change': pct_change
-        })
-    
-    return results
+            'scenario_value': scenario_values[i],
+            'value_change': value_changes[i],
+            'pct_change': pct_changes[i]
+        }
+        for i, scenario in enumerate(scenarios)
+    ]
 
 def get_default_scenarios():
     """Get predefined market scenarios"""
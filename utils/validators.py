@@ -1,5 +1,102 @@
 import re
-import json
+
+import orjson
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+if MSGSPEC_AVAILABLE:
+    class StockInput(msgspec.Struct):
+        symbol: str
+        quantity: float
+        cost_basis: float = 0.0
+
+    class InvestorInput(msgspec.Struct):
+        id: str
+        name: str
+        stocks: list[StockInput]
+
+    class PortfolioInput(msgspec.Struct):
+        email: str
+        investor: list[InvestorInput]
+
+    # strict=False lets the C decoder coerce the JSON-string quantities the
+    # input format uses into floats during the parse itself
+    _portfolio_decoder = msgspec.json.Decoder(PortfolioInput, strict=False)
+
+
+def decode_portfolio_json(buf):
+    """
+    Parse, validate and sanitize a raw portfolio JSON payload in one pass.
+
+    With msgspec installed, parsing, shape/type validation and numeric
+    coercion all happen inside the C decoder; only the domain rules run in
+    Python. Otherwise falls back to the hand-rolled validator passes.
+
+    Returns: (portfolio_dict, error_message) - exactly one is None.
+    """
+    if MSGSPEC_AVAILABLE:
+        try:
+            portfolio = _portfolio_decoder.decode(buf)
+        except msgspec.ValidationError as e:
+            return None, str(e)
+        except msgspec.DecodeError:
+            return None, "Invalid JSON format"
+        json_input = msgspec.to_builtins(portfolio)
+        is_valid, message = _check_portfolio_rules(json_input)
+        if not is_valid:
+            return None, message
+        return json_input, None
+
+    try:
+        json_input = orjson.loads(buf)
+    except Exception:
+        return None, "Invalid JSON format"
+    is_valid, message = validate_portfolio_json(json_input)
+    if not is_valid:
+        return None, message
+    return sanitize_json_input(json_input), None
+
+
+def _check_portfolio_rules(json_input):
+    """Domain rules the struct schema cannot express"""
+    email = json_input['email']
+    if not validate_email(email):
+        return False, f"Invalid email format: {email}"
+
+    investors = json_input['investor']
+    if len(investors) == 0:
+        return False, "At least one investor required"
+    if len(investors) > 20:
+        return False, "Maximum 20 family members allowed"
+
+    investor_ids = set()
+    for investor in investors:
+        investor_id = investor['id']
+        if not investor_id:
+            return False, "Invalid investor ID"
+        if investor_id in investor_ids:
+            return False, f"Duplicate investor ID: {investor_id}"
+        investor_ids.add(investor_id)
+
+        stocks = investor['stocks']
+        if len(stocks) == 0:
+            return False, f"Investor {investor_id}: At least one stock required"
+        if len(stocks) > 50:
+            return False, f"Investor {investor_id}: Maximum 50 stocks allowed"
+
+        for stock in stocks:
+            if not stock['symbol']:
+                return False, f"Investor {investor_id}: Invalid symbol format"
+            if stock['quantity'] <= 0:
+                return False, f"Investor {investor_id}, Symbol {stock['symbol']}: Quantity must be positive"
+            if stock['cost_basis'] < 0:
+                return False, f"Investor {investor_id}, Symbol {stock['symbol']}: Cost basis cannot be negative"
+
+    return True, "Valid"
 
 def validate_email(email):
     """Validate email format"""
@@ -14,8 +111,8 @@ def validate_portfolio_json(json_input):
     # Check if json_input is a dict
     if not isinstance(json_input, dict):
         try:
-            json_input = json.loads(json_input)
-        except:
+            json_input = orjson.loads(json_input)
+        except orjson.JSONDecodeError:
             return False, "Invalid JSON format"
     
     # Check required fields
@@ -111,7 +208,7 @@ def validate_portfolio_json(json_input):
 def sanitize_json_input(json_input):
     """Sanitize and normalize JSON input"""
     if isinstance(json_input, str):
-        json_input = json.loads(json_input)
+        json_input = orjson.loads(json_input)
     
     # Ensure all numeric fields are proper numbers
     for investor in json_input.get('investor', []):
@@ -1,65 +1,104 @@
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
-def create_family_treemap(portfolio_data):
-    """Create treemap showing family portfolio allocation"""
+# Shared layout compiled once as a template: applying a template is a shallow
+# merge at figure creation, so the common margins/fonts/brand colorway are no
+# longer re-validated inside every builder
+pio.templates['wealthwisers'] = go.layout.Template(
+    layout={
+        'margin': {'t': 50, 'l': 0, 'r': 0, 'b': 0},
+        'colorway': ['#1a5e63', '#c8932e', '#2d7f85', '#d4a445', '#1e3a8a', '#f97316']
+    }
+)
+pio.templates.default = 'wealthwisers'
+
+# Figures here carry float arrays (treemap values, correlation matrices,
+# frontier sweeps); orjson serializes those natively instead of going
+# through plotly's per-element NumPy-aware json encoder
+pio.json.config.default_engine = 'orjson'
+
+def create_family_treemap(portfolio_data, fig=None):
+    """Create treemap showing family portfolio allocation
+
+    If an existing figure is passed, a patched clone is returned with only
+    the trace arrays swapped, so the frontend can diff the update
+    (Plotly.react-style) instead of rebuilding the whole plot.
+    """
     family_holdings = portfolio_data['family_holdings']
-    
+
     labels = []
     parents = []
     values = []
     colors = []
-    
+
     # Root
     labels.append("Family Portfolio")
     parents.append("")
     values.append(portfolio_data['family']['total_value'])
     colors.append(0)
-    
+
     # Add each stock
     for symbol, data in family_holdings.items():
         labels.append(f"{symbol}<br>₹{data['value']:,.0f}")
         parents.append("Family Portfolio")
         values.append(data['value'])
         colors.append(data['weight'])
-    
-    fig = go.Figure(go.Treemap(
-        labels=labels,
-        parents=parents,
-        values=values,
-        marker=dict(
-            colorscale='Viridis',
-            cmid=50,
-            colorbar=dict(title="Weight %")
-        ),
-        textposition="middle center",
-        textfont=dict(size=14)
-    ))
-    
-    fig.update_layout(
-        title="Family Portfolio Allocation",
-        height=500,
-        margin=dict(t=50, l=0, r=0, b=0)
-    )
-    
-    return fig
 
-def create_member_treemap(member_data):
-    """Create treemap for individual member"""
+    if fig is not None and fig.data:
+        patched = go.Figure(fig)
+        patched.update_traces(labels=labels, parents=parents, values=values)
+        return patched
+
+    # Build from a raw dict spec: skips per-attribute validation/coercion,
+    # which dominates construction time when several figures are emitted
+    # in a single callback
+    return go.Figure({
+        'data': [{
+            'type': 'treemap',
+            'labels': labels,
+            'parents': parents,
+            'values': values,
+            'marker': {
+                'colorscale': 'Viridis',
+                'cmid': 50,
+                'colorbar': {'title': "Weight %"}
+            },
+            'textposition': "middle center",
+            'textfont': {'size': 14}
+        }],
+        'layout': {
+            'title': "Family Portfolio Allocation",
+            'height': 500
+        }
+    }, skip_invalid=True)
+
+def create_member_treemap(member_data, fig=None):
+    """Create treemap for individual member
+
+    Passing an existing figure returns a patched clone with updated trace
+    arrays rather than a freshly built figure (see create_family_treemap).
+    """
     labels = [f"{member_data['name']}'s Portfolio"]
     parents = [""]
     values = [member_data['value']]
     colors = [0]
-    
+
     for holding in member_data['holdings']:
         labels.append(f"{holding['symbol']}<br>₹{holding['value']:,.0f}")
         parents.append(f"{member_data['name']}'s Portfolio")
         values.append(holding['value'])
         colors.append(holding['weight'])
-    
+
+    if fig is not None and fig.data:
+        patched = go.Figure(fig)
+        patched.update_traces(labels=labels, parents=parents, values=values)
+        patched.update_layout(title=f"{member_data['name']}'s Portfolio Allocation")
+        return patched
+
     fig = go.Figure(go.Treemap(
         labels=labels,
         parents=parents,
@@ -73,8 +112,7 @@ def create_member_treemap(member_data):
     
     fig.update_layout(
         title=f"{member_data['name']}'s Portfolio Allocation",
-        height=400,
-        margin=dict(t=50, l=0, r=0, b=0)
+        height=400
     )
     
     return fig
@@ -100,12 +138,24 @@ def create_allocation_pie(holdings_data, title="Portfolio Allocation"):
     
     return fig
 
-def create_member_comparison_bar(members_data):
-    """Create bar chart comparing members"""
+def create_member_comparison_bar(members_data, fig=None):
+    """Create bar chart comparing members
+
+    Passing an existing figure returns a patched clone with only the bar
+    arrays swapped, the same diff-friendly update used by the treemaps.
+    """
     names = [m['name'] for m in members_data]
     values = [m['value'] for m in members_data]
     gains = [m['gain_pct'] for m in members_data]
-    
+
+    if fig is not None and len(fig.data) == 2:
+        patched = go.Figure(fig)
+        patched.data[0].update(x=names, y=values, text=[f"₹{v:,.0f}" for v in values])
+        patched.data[1].update(x=names, y=gains,
+                               marker_color=['green' if g > 0 else 'red' for g in gains],
+                               text=[f"{g:.1f}%" for g in gains])
+        return patched
+
     fig = make_subplots(
         rows=1, cols=2,
         subplot_titles=("Portfolio Value", "Gain %"),
@@ -148,9 +198,12 @@ def create_member_comparison_bar(members_data):
     return fig
 
 def create_holdings_table(holdings_data):
-    """Create table showing holdings details"""
-    df = pd.DataFrame(holdings_data)
-    
+    """Create table showing holdings details
+
+    Accepts either a list of holding dicts or an already-columnar DataFrame.
+    """
+    df = holdings_data if isinstance(holdings_data, pd.DataFrame) else pd.DataFrame(holdings_data)
+
     # Select and format columns
     table_data = df[['symbol', 'quantity', 'current_price', 'value', 'weight', 'gain_pct']].copy()
     
@@ -162,14 +215,20 @@ def create_holdings_table(holdings_data):
             font=dict(size=12, color='black')
         ),
         cells=dict(
+            # Raw columns straight from the frame; the ₹/% decoration is
+            # applied client-side via d3 formats instead of a Python
+            # f-string loop per column
             values=[
                 table_data['symbol'],
                 table_data['quantity'],
-                [f"₹{p:.2f}" for p in table_data['current_price']],
-                [f"₹{v:,.2f}" for v in table_data['value']],
-                [f"{w:.1f}%" for w in table_data['weight']],
-                [f"{g:.1f}%" for g in table_data['gain_pct']]
+                table_data['current_price'],
+                table_data['value'],
+                table_data['weight'],
+                table_data['gain_pct']
             ],
+            format=[None, None, ',.2f', ',.2f', '.1f', '.1f'],
+            prefix=[None, None, '₹', '₹', None, None],
+            suffix=[None, None, None, None, '%', '%'],
             fill_color='lavender',
             align='left',
             font=dict(size=11)
@@ -178,8 +237,7 @@ def create_holdings_table(holdings_data):
     
     fig.update_layout(
         title="Holdings Details",
-        height=min(400, len(holdings_data) * 40 + 100),
-        margin=dict(t=50, l=0, r=0, b=0)
+        height=min(400, len(holdings_data) * 40 + 100)
     )
     
     return fig
@@ -286,54 +344,67 @@ def create_risk_indicator(risk_score):
     
     return fig
 
-def create_efficient_frontier(frontier_data, current_point=None, optimal_point=None):
-    """Create efficient frontier visualization"""
-    fig = go.Figure()
-    
-    # Efficient frontier curve
-    fig.add_trace(go.Scatter(
-        x=frontier_data['volatility'],
-        y=[r * 100 for r in frontier_data['returns']],  # Convert to percentage
-        mode='lines',
-        name='Efficient Frontier',
-        line=dict(color='blue', width=2),
-        hovertemplate='Volatility: %{x:.2%}<br>Return: %{y:.2f}%<extra></extra>'
-    ))
-    
+def create_efficient_frontier(frontier_data, current_point=None, optimal_point=None, fig=None):
+    """Create efficient frontier visualization
+
+    Passing the previous figure returns a patched clone with the trace
+    arrays swapped, so re-running optimization ships a diff instead of a
+    rebuilt plot; uirevision keeps the user's zoom across updates.
+    """
+    # Dict-spec traces (scattergl = WebGL-backed) assembled up front and
+    # validated once via skip_invalid instead of per-attribute coercion
+    data = [{
+        'type': 'scattergl',
+        'x': frontier_data['volatility'],
+        'y': [r * 100 for r in frontier_data['returns']],  # Convert to percentage
+        'mode': 'lines',
+        'name': 'Efficient Frontier',
+        'line': {'color': 'blue', 'width': 2},
+        'hovertemplate': 'Volatility: %{x:.2%}<br>Return: %{y:.2f}%<extra></extra>'
+    }]
+
     # Current portfolio
     if current_point:
-        fig.add_trace(go.Scatter(
-            x=[current_point['volatility']],
-            y=[current_point['expected_return'] * 100],
-            mode='markers',
-            name='Current Portfolio',
-            marker=dict(size=15, color='red', symbol='circle'),
-            hovertemplate='Current<br>Volatility: %{x:.2%}<br>Return: %{y:.2f}%<extra></extra>'
-        ))
-    
+        data.append({
+            'type': 'scattergl',
+            'x': [current_point['volatility']],
+            'y': [current_point['expected_return'] * 100],
+            'mode': 'markers',
+            'name': 'Current Portfolio',
+            'marker': {'size': 15, 'color': 'red', 'symbol': 'circle'},
+            'hovertemplate': 'Current<br>Volatility: %{x:.2%}<br>Return: %{y:.2f}%<extra></extra>'
+        })
+
     # Optimal portfolio
     if optimal_point:
-        fig.add_trace(go.Scatter(
-            x=[optimal_point['volatility']],
-            y=[optimal_point['expected_return'] * 100],
-            mode='markers',
-            name='Optimized Portfolio',
-            marker=dict(size=15, color='green', symbol='star'),
-            hovertemplate='Optimized<br>Volatility: %{x:.2%}<br>Return: %{y:.2f}%<extra></extra>'
-        ))
-    
-    fig.update_layout(
-        title='Efficient Frontier',
-        xaxis_title='Volatility (Risk)',
-        yaxis_title='Expected Return (%)',
-        height=500,
-        hovermode='closest',
-        showlegend=True
-    )
-    
-    fig.update_xaxes(tickformat='.1%')
-    
-    return fig
+        data.append({
+            'type': 'scattergl',
+            'x': [optimal_point['volatility']],
+            'y': [optimal_point['expected_return'] * 100],
+            'mode': 'markers',
+            'name': 'Optimized Portfolio',
+            'marker': {'size': 15, 'color': 'green', 'symbol': 'star'},
+            'hovertemplate': 'Optimized<br>Volatility: %{x:.2%}<br>Return: %{y:.2f}%<extra></extra>'
+        })
+
+    if fig is not None and len(fig.data) == len(data):
+        patched = go.Figure(fig)
+        for trace, spec in zip(patched.data, data):
+            trace.update(x=spec['x'], y=spec['y'])
+        return patched
+
+    return go.Figure({
+        'data': data,
+        'layout': {
+            'title': 'Efficient Frontier',
+            'xaxis': {'title': 'Volatility (Risk)', 'tickformat': '.1%'},
+            'yaxis': {'title': 'Expected Return (%)'},
+            'height': 500,
+            'hovermode': 'closest',
+            'showlegend': True,
+            'uirevision': 'keep'
+        }
+    }, skip_invalid=True)
 
 def create_weights_comparison(current_weights, optimized_weights, title="Current vs Optimized Allocation"):
     """Create side-by-side comparison of current and optimized weights"""
@@ -411,14 +482,17 @@ def create_rebalancing_table(trades):
     
     fig.update_layout(
         title="Rebalancing Recommendations",
-        height=min(400, len(trades) * 40 + 100),
-        margin=dict(t=50, l=0, r=0, b=0)
+        height=min(400, len(trades) * 40 + 100)
     )
     
     return fig
 
-def create_correlation_heatmap(corr_matrix):
-    """Create correlation heatmap"""
+def create_correlation_heatmap(corr_matrix, fig=None):
+    """Create correlation heatmap
+
+    Passing the previous heatmap returns a patched clone with only the
+    z/x/y arrays swapped (see create_efficient_frontier).
+    """
     if corr_matrix.empty:
         fig = go.Figure()
         fig.add_annotation(
@@ -430,26 +504,44 @@ def create_correlation_heatmap(corr_matrix):
         fig.update_layout(height=400)
         return fig
     
-    fig = go.Figure(data=go.Heatmap(
-        z=corr_matrix.values,
-        x=corr_matrix.columns,
-        y=corr_matrix.index,
-        colorscale='RdBu',
-        zmid=0,
-        text=corr_matrix.values,
-        texttemplate='%{text:.2f}',
-        textfont={"size": 10},
-        colorbar=dict(title="Correlation")
-    ))
-    
-    fig.update_layout(
-        title='Stock Correlation Matrix',
-        height=500,
-        xaxis={'side': 'bottom'},
-        yaxis={'side': 'left'}
-    )
-    
-    return fig
+    # Per-cell text annotations are SVG nodes: for a large family the
+    # holdings x holdings grid stalls the main thread, so only render them
+    # on small matrices and rely on hover for the rest
+    show_cell_text = len(corr_matrix) <= 20
+    # Rounding to 3 decimals shrinks the serialized JSON without any
+    # visible change in the color scale
+    z_values = np.round(corr_matrix.values, 3)
+    trace = {
+        'type': 'heatmap',
+        'z': z_values,
+        'x': list(corr_matrix.columns),
+        'y': list(corr_matrix.index),
+        'colorscale': 'RdBu',
+        'zmid': 0,
+        'textfont': {"size": 10},
+        'colorbar': {'title': "Correlation"}
+    }
+    if show_cell_text:
+        trace['text'] = z_values
+        trace['texttemplate'] = '%{text:.2f}'
+
+    if fig is not None and fig.data and fig.data[0].type == 'heatmap':
+        patched = go.Figure(fig)
+        patched.update_traces(z=trace['z'], x=trace['x'], y=trace['y'],
+                              text=trace.get('text'),
+                              texttemplate=trace.get('texttemplate'))
+        return patched
+
+    return go.Figure({
+        'data': [trace],
+        'layout': {
+            'title': 'Stock Correlation Matrix',
+            'height': 500,
+            'xaxis': {'side': 'bottom'},
+            'yaxis': {'side': 'left'},
+            'uirevision': 'keep'
+        }
+    }, skip_invalid=True)
 
 def create_risk_contribution_chart(risk_contributions):
     """Create chart showing risk contribution by holding"""
@@ -5,8 +5,11 @@ Creates professional PDF reports with charts and metrics
 
 import io
 import base64
+import logging
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 try:
     from weasyprint import HTML, CSS
     WEASYPRINT_AVAILABLE = True
@@ -695,8 +698,6 @@ def generate_pdf_report(portfolio_data, charts_dict=None, optimization_result=No
         
         return output_path
         
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error generating PDF")
         return None